@@ -2,53 +2,327 @@
 import numpy as np
 from config import GAP_OPEN, GAP_EXTEND, SCORE_THRESHOLD
 
+try:
+    from numba import njit, prange  # type: ignore
+except ImportError:
+    # numba is optional; the pure-Python kernel still works without it
+    njit = None
+    prange = range
 
-def smith_waterman_chunks(S, gap_open=GAP_OPEN, gap_extend=GAP_EXTEND, 
-                          score_threshold=SCORE_THRESHOLD):
+import alignment_cuda
+
+# Below this cell count the serial kernel wins; thread fork/join overhead
+# dominates on the small matrices typical of single-protein analyses
+_PARALLEL_MIN_CELLS = 65536
+
+# Matrices this large (million-cell range) are worth the host-to-device
+# round trip of the CUDA wavefront kernel, when a GPU is present
+_GPU_MIN_CELLS = 1 << 20
+
+# At or below this cell count (~128x128, the typical single-protein case)
+# the whole DP state fits in L2, so the two-pass score-then-retrace split
+# saves nothing and its extra kernel launch and argmax prologue dominate.
+# Small matrices go straight to a single full fill instead
+_SMALL_MAX_CELLS = 128 * 128
+
+
+def _sw_fill_impl(S, gap_open, gap_extend, score_threshold, mask):
     """
-    Smith-Waterman local alignment on chunk similarity matrix (matching notebook exactly)
-    
+    Fill the Smith-Waterman scoring and traceback matrices.
+
+    This is the hot loop, written so numba can compile it to native code:
+    no list allocations, no np.argmax — just an unrolled 4-way compare per
+    cell writing into preallocated arrays.
+
+    Cells are processed along anti-diagonals: every cell on a diagonal only
+    depends on the two previous diagonals, so iterations of the inner loop
+    are independent of each other and the compiler is free to vectorize
+    them (an AVX2-intrinsics C extension would do the same thing by hand).
+
+    Affine gaps use the Gotoh H/E/F formulation (the same recurrence
+    Farrar's striped SW vectorizes): E tracks the best vertical-gap score,
+    F the best horizontal-gap score, so the open-vs-extend decision is a
+    branch-free max instead of a lookup into the traceback state.
+
     Args:
-        S (numpy.ndarray): Similarity matrix (n_human x n_bact)
+        S (numpy.ndarray): Similarity matrix (n_human x n_bact), float32
         gap_open (float): Gap opening penalty
         gap_extend (float): Gap extension penalty
         score_threshold (float): Minimum similarity score to consider
-        
+
     Returns:
-        tuple: (max_score, alignment_path, H_matrix)
-            - max_score (float): Maximum alignment score
-            - alignment_path (list): List of (i, j) tuples representing aligned positions
-            - H_matrix (numpy.ndarray): Full scoring matrix
+        tuple: (H, traceback, max_score, max_i, max_j)
     """
     n_human, n_bact = S.shape
-    H_matrix = np.zeros((n_human + 1, n_bact + 1))
-    traceback = np.zeros((n_human + 1, n_bact + 1), dtype=int)
-    max_score = 0
-    max_pos = (0, 0)
+    # float32 DP state: halves the footprint vs float64, so the two-diagonal
+    # dependency window stays inside L1 for typical chunk counts
+    H = np.zeros((n_human + 1, n_bact + 1), dtype=np.float32)
+    E = np.full((n_human + 1, n_bact + 1), np.float32(-np.inf), dtype=np.float32)
+    F = np.full((n_human + 1, n_bact + 1), np.float32(-np.inf), dtype=np.float32)
+    traceback = np.zeros((n_human + 1, n_bact + 1), dtype=np.int8)
+    max_score = 0.0
+    max_i = 0
+    max_j = 0
+
+    for d in range(2, n_human + n_bact + 1):
+        i_lo = max(1, d - n_bact)
+        i_hi = min(n_human, d - 1)
+        for i in range(i_lo, i_hi + 1):
+            j = d - i
+            # Subtract threshold from similarity (notebook logic);
+            # masked cells are knocked out without touching S itself
+            sim = S[i - 1, j - 1] - score_threshold - mask[i - 1, j - 1] * 1e30
+            match = H[i - 1, j - 1] + sim
+
+            # Affine gaps: open from H, or extend the running E/F gap
+            gap_h = max(H[i - 1, j] + gap_open, E[i - 1, j] + gap_extend)
+            gap_b = max(H[i, j - 1] + gap_open, F[i, j - 1] + gap_extend)
+            E[i, j] = gap_h
+            F[i, j] = gap_b
+
+            # Choose best option: 0=stop, 1=match, 2=gap_h, 3=gap_b
+            # Branchless 4-way select: each step is a pair of conditional
+            # moves (value, code), no unpredictable branch in the hot loop
+            m1 = match if match > 0.0 else 0.0
+            c1 = 1 if match > 0.0 else 0
+            m2 = gap_h if gap_h > m1 else m1
+            c2 = 2 if gap_h > m1 else c1
+            best_score = gap_b if gap_b > m2 else m2
+            best = 3 if gap_b > m2 else c2
+
+            H[i, j] = best_score
+            traceback[i, j] = best
+
+            if best_score > max_score:
+                max_score = best_score
+                max_i = i
+                max_j = j
+
+    return H, traceback, max_score, max_i, max_j
+
+
+def _sw_fill_parallel_impl(S, gap_open, gap_extend, score_threshold, mask):
+    """
+    Parallel variant of _sw_fill for large matrices.
+
+    Same recurrence, but the cells of each anti-diagonal are split across
+    threads with prange. The max cell cannot be tracked race-free inside
+    the loop, so it is recovered with a single argmax over H afterwards.
+    """
+    n_human, n_bact = S.shape
+    # float32 DP state: halves the footprint vs float64, so the two-diagonal
+    # dependency window stays inside L1 for typical chunk counts
+    H = np.zeros((n_human + 1, n_bact + 1), dtype=np.float32)
+    E = np.full((n_human + 1, n_bact + 1), np.float32(-np.inf), dtype=np.float32)
+    F = np.full((n_human + 1, n_bact + 1), np.float32(-np.inf), dtype=np.float32)
+    traceback = np.zeros((n_human + 1, n_bact + 1), dtype=np.int8)
+
+    for d in range(2, n_human + n_bact + 1):
+        i_lo = max(1, d - n_bact)
+        i_hi = min(n_human, d - 1)
+        for i in prange(i_lo, i_hi + 1):
+            j = d - i
+            sim = S[i - 1, j - 1] - score_threshold - mask[i - 1, j - 1] * 1e30
+            match = H[i - 1, j - 1] + sim
+
+            gap_h = max(H[i - 1, j] + gap_open, E[i - 1, j] + gap_extend)
+            gap_b = max(H[i, j - 1] + gap_open, F[i, j - 1] + gap_extend)
+            E[i, j] = gap_h
+            F[i, j] = gap_b
+
+            # Branchless 4-way select: each step is a pair of conditional
+            # moves (value, code), no unpredictable branch in the hot loop
+            m1 = match if match > 0.0 else 0.0
+            c1 = 1 if match > 0.0 else 0
+            m2 = gap_h if gap_h > m1 else m1
+            c2 = 2 if gap_h > m1 else c1
+            best_score = gap_b if gap_b > m2 else m2
+            best = 3 if gap_b > m2 else c2
+
+            H[i, j] = best_score
+            traceback[i, j] = best
+
+    flat = np.argmax(H)
+    max_i = flat // (n_bact + 1)
+    max_j = flat % (n_bact + 1)
+    return H, traceback, H[max_i, max_j], max_i, max_j
+
+
+def _sw_score_only_impl(S, gap_open, gap_extend, score_threshold, mask):
+    """
+    Pass-1 kernel: compute only the maximum score and its position.
+
+    No H or traceback matrices are materialized — just two rolling H rows,
+    one E row and a running F scalar, so the fill touches O(n_bact) memory
+    instead of O(n_human * n_bact). The short alignment path is recovered
+    afterwards by re-filling only the [0:max_i, 0:max_j] subrectangle,
+    which is identical to the corresponding region of the full fill since
+    SW cells only ever depend on cells above and to the left.
+    """
+    n_human, n_bact = S.shape
+    H_prev = np.zeros(n_bact + 1, dtype=np.float32)
+    H_cur = np.zeros(n_bact + 1, dtype=np.float32)
+    E_row = np.full(n_bact + 1, np.float32(-np.inf), dtype=np.float32)
+    max_score = 0.0
+    max_i = 0
+    max_j = 0
 
     for i in range(1, n_human + 1):
+        H_cur[0] = 0.0
+        f = np.float32(-np.inf)
         for j in range(1, n_bact + 1):
-            # Subtract threshold from similarity (notebook logic)
-            sim = S[i-1, j-1] - score_threshold
-            match = H_matrix[i-1, j-1] + sim
-            
-            # Gap extension: use gap_extend if continuing a gap, gap_open if starting new gap
-            gap_h = H_matrix[i-1, j] + (gap_extend if traceback[i-1, j] == 2 else gap_open)
-            gap_b = H_matrix[i, j-1] + (gap_extend if traceback[i, j-1] == 3 else gap_open)
+            sim = S[i - 1, j - 1] - score_threshold - mask[i - 1, j - 1] * 1e30
+            match = H_prev[j - 1] + sim
 
-            # Choose best option: 0=stop, 1=match, 2=gap_h, 3=gap_b
-            scores = [0, match, gap_h, gap_b]
-            best = np.argmax(scores)
-            H_matrix[i, j] = scores[best]
+            e = max(H_prev[j] + gap_open, E_row[j] + gap_extend)
+            f = max(H_cur[j - 1] + gap_open, f + gap_extend)
+            E_row[j] = e
+
+            m1 = match if match > 0.0 else 0.0
+            m2 = e if e > m1 else m1
+            best_score = f if f > m2 else m2
+            H_cur[j] = best_score
+
+            if best_score > max_score:
+                max_score = best_score
+                max_i = i
+                max_j = j
+
+        H_prev, H_cur = H_cur, H_prev
+
+    return max_score, max_i, max_j
+
+
+# Fixed-point scale for the quantized scoring path. SW only needs the
+# ordering of scores, so int16 similarities at 1e-4 resolution reproduce
+# the same argmax decisions while halving memory bandwidth
+_Q_SCALE = 10000
+
+
+def _sw_fill_q_impl(S_q, gap_open_q, gap_extend_q, mask):
+    """
+    Quantized variant of _sw_fill on int16 similarities.
+
+    S_q already has the score threshold subtracted and is scaled by
+    _Q_SCALE. H/E/F accumulate in int32 (a path of n+m cells stays far
+    below the int32 range, so no saturation handling is needed).
+    """
+    n_human, n_bact = S_q.shape
+    H = np.zeros((n_human + 1, n_bact + 1), dtype=np.int32)
+    E = np.full((n_human + 1, n_bact + 1), np.int32(-2**30), dtype=np.int32)
+    F = np.full((n_human + 1, n_bact + 1), np.int32(-2**30), dtype=np.int32)
+    traceback = np.zeros((n_human + 1, n_bact + 1), dtype=np.int8)
+    max_score = 0
+    max_i = 0
+    max_j = 0
+
+    for d in range(2, n_human + n_bact + 1):
+        i_lo = max(1, d - n_bact)
+        i_hi = min(n_human, d - 1)
+        for i in range(i_lo, i_hi + 1):
+            j = d - i
+            sim = np.int32(S_q[i - 1, j - 1]) - np.int32(mask[i - 1, j - 1]) * np.int32(2**28)
+            match = H[i - 1, j - 1] + sim
+
+            gap_h = max(H[i - 1, j] + gap_open_q, E[i - 1, j] + gap_extend_q)
+            gap_b = max(H[i, j - 1] + gap_open_q, F[i, j - 1] + gap_extend_q)
+            E[i, j] = gap_h
+            F[i, j] = gap_b
+
+            m1 = match if match > 0 else 0
+            c1 = 1 if match > 0 else 0
+            m2 = gap_h if gap_h > m1 else m1
+            c2 = 2 if gap_h > m1 else c1
+            best_score = gap_b if gap_b > m2 else m2
+            best = 3 if gap_b > m2 else c2
+
+            H[i, j] = best_score
             traceback[i, j] = best
 
-            if H_matrix[i, j] > max_score:
-                max_score = H_matrix[i, j]
-                max_pos = (i, j)
+            if best_score > max_score:
+                max_score = best_score
+                max_i = i
+                max_j = j
+
+    return H, traceback, max_score, max_i, max_j
+
+
+if njit is not None:
+    _sw_fill = njit(cache=True, fastmath=True, boundscheck=False)(_sw_fill_impl)
+    _sw_fill_parallel = njit(cache=True, fastmath=True, boundscheck=False,
+                             parallel=True)(_sw_fill_parallel_impl)
+    _sw_fill_q = njit(cache=True, boundscheck=False)(_sw_fill_q_impl)
+    _sw_score_only = njit(cache=True, fastmath=True,
+                          boundscheck=False)(_sw_score_only_impl)
+else:
+    _sw_fill = _sw_fill_impl
+    _sw_fill_parallel = _sw_fill_parallel_impl
+    _sw_fill_q = _sw_fill_q_impl
+    _sw_score_only = _sw_score_only_impl
+
+
+def smith_waterman_chunks(S, gap_open=GAP_OPEN, gap_extend=GAP_EXTEND,
+                          score_threshold=SCORE_THRESHOLD, mask=None,
+                          quantize=False):
+    """
+    Smith-Waterman local alignment on chunk similarity matrix (matching notebook exactly)
+
+    Args:
+        S (numpy.ndarray): Similarity matrix (n_human x n_bact)
+        gap_open (float): Gap opening penalty
+        gap_extend (float): Gap extension penalty
+        score_threshold (float): Minimum similarity score to consider
+        mask (numpy.ndarray): Optional uint8 bitmap (n_human x n_bact);
+            nonzero cells are excluded from the alignment
+        quantize (bool): Run the DP on int16 fixed-point similarities
+            (1e-4 resolution) instead of float — same decisions at half
+            the memory bandwidth; scores are dequantized on return
+
+    Returns:
+        tuple: (max_score, alignment_path)
+            - max_score (float): Maximum alignment score
+            - alignment_path (list): List of (i, j) tuples representing aligned positions
+    """
+    # Contiguous float32 so the jitted kernel generates tight loads
+    S = np.ascontiguousarray(S, dtype=np.float32)
+    if mask is None:
+        mask = np.zeros(S.shape, dtype=np.uint8)
+
+    if quantize:
+        S_q = np.round((S - score_threshold) * _Q_SCALE).astype(np.int16)
+        H_q, traceback, max_score_q, max_i, max_j = _sw_fill_q(
+            S_q, int(round(gap_open * _Q_SCALE)),
+            int(round(gap_extend * _Q_SCALE)), mask)
+        # The traceback only tests H > 0, which is scale-invariant, so the
+        # int32 matrix is used as-is; only the score is dequantized
+        H_matrix = H_q
+        max_score = max_score_q / _Q_SCALE
+    elif alignment_cuda.is_available() and S.size >= _GPU_MIN_CELLS:
+        H_matrix, traceback, max_score, max_i, max_j = alignment_cuda.sw_fill_gpu(
+            S, gap_open, gap_extend, score_threshold, mask)
+    elif S.size <= _SMALL_MAX_CELLS:
+        # Common small-matrix case: one direct fill, no prepass overhead
+        H_matrix, traceback, max_score, max_i, max_j = _sw_fill(
+            S, gap_open, gap_extend, score_threshold, mask)
+    else:
+        # Pass 1: score-only fill, O(n_bact) memory, no traceback stored
+        max_score, max_i, max_j = _sw_score_only(
+            S, gap_open, gap_extend, score_threshold, mask)
+        if max_i == 0 or max_j == 0:
+            return 0.0, []
+
+        # Pass 2: re-fill only the subrectangle ending at the max cell to
+        # recover the traceback; identical to the same region of a full
+        # fill since SW cells only depend on cells above and to the left
+        S_sub = np.ascontiguousarray(S[:max_i, :max_j])
+        mask_sub = np.ascontiguousarray(mask[:max_i, :max_j])
+        fill = _sw_fill_parallel if S_sub.size >= _PARALLEL_MIN_CELLS else _sw_fill
+        H_matrix, traceback, max_score, max_i, max_j = fill(
+            S_sub, gap_open, gap_extend, score_threshold, mask_sub)
 
     # Traceback
     alignment = []
-    i, j = max_pos
+    i, j = max_i, max_j
     while i > 0 and j > 0 and H_matrix[i, j] > 0:
         if traceback[i, j] == 1:  # match/mismatch
             alignment.append((i-1, j-1))
@@ -62,14 +336,14 @@ def smith_waterman_chunks(S, gap_open=GAP_OPEN, gap_extend=GAP_EXTEND,
             break
 
     alignment.reverse()
-    return max_score, alignment, H_matrix
+    return max_score, alignment
 
 
 def find_multiple_alignments(S, gap_open=GAP_OPEN, gap_extend=GAP_EXTEND,
                              min_score=1.0, min_chunks=3, max_alignments=10):
     """
     Find multiple non-overlapping alignment regions
-    
+
     Args:
         S (numpy.ndarray): Similarity matrix
         gap_open (float): Gap opening penalty
@@ -77,24 +351,27 @@ def find_multiple_alignments(S, gap_open=GAP_OPEN, gap_extend=GAP_EXTEND,
         min_score (float): Minimum score for an alignment to be kept
         min_chunks (int): Minimum number of chunks in an alignment
         max_alignments (int): Maximum number of alignments to find
-        
+
     Returns:
         list: List of (score, alignment) tuples
     """
     alignments = []
-    S_work = S.copy()
-    
+    # Masked cells are tracked in a bitmap instead of cloning and zeroing
+    # S on every iteration; S itself is never written
+    mask = np.zeros(S.shape, dtype=np.uint8)
+
     for _ in range(max_alignments):
-        score, alignment, _ = smith_waterman_chunks(S_work, gap_open, gap_extend)
-        
+        score, alignment = smith_waterman_chunks(S, gap_open, gap_extend,
+                                                 mask=mask)
+
         # Stop if score too low or alignment too short
         if score < min_score or len(alignment) < min_chunks:
             break
-        
+
         alignments.append((score, alignment))
-        
+
         # Mask the aligned region to find next alignment
         for i, j in alignment:
-            S_work[i, j] = 0
-    
+            mask[i, j] = 1
+
     return alignments
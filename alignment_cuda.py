@@ -0,0 +1,106 @@
+"""Optional CUDA Smith-Waterman fill via CuPy (falls back to CPU when absent)"""
+import numpy as np
+
+try:
+    import cupy as cp  # type: ignore
+except ImportError:
+    # CuPy is optional; alignment.py only dispatches here when it imports
+    cp = None
+
+
+# Anti-diagonal wavefront fill: a single block so __syncthreads() acts as
+# the barrier between diagonals, one thread striding over the cells of the
+# current diagonal (they are mutually independent)
+_SW_FILL_SRC = r"""
+extern "C" __global__
+void sw_fill(const float* S, const unsigned char* mask,
+             float* H, float* E, float* F, signed char* tb,
+             const int n, const int m,
+             const float gap_open, const float gap_extend, const float thr)
+{
+    const int W = m + 1;
+    for (int d = 2; d <= n + m; ++d) {
+        const int i_lo = max(1, d - m);
+        const int i_hi = min(n, d - 1);
+        for (int i = i_lo + (int)threadIdx.x; i <= i_hi; i += (int)blockDim.x) {
+            const int j = d - i;
+            float sim = S[(i - 1) * m + (j - 1)] - thr;
+            if (mask[(i - 1) * m + (j - 1)]) sim -= 1e30f;
+            const float match = H[(i - 1) * W + (j - 1)] + sim;
+
+            const float e = fmaxf(H[(i - 1) * W + j] + gap_open,
+                                  E[(i - 1) * W + j] + gap_extend);
+            const float f = fmaxf(H[i * W + (j - 1)] + gap_open,
+                                  F[i * W + (j - 1)] + gap_extend);
+            E[i * W + j] = e;
+            F[i * W + j] = f;
+
+            float best = 0.0f;
+            signed char code = 0;
+            if (match > best) { best = match; code = 1; }
+            if (e > best)     { best = e;     code = 2; }
+            if (f > best)     { best = f;     code = 3; }
+            H[i * W + j] = best;
+            tb[i * W + j] = code;
+        }
+        __syncthreads();
+    }
+}
+"""
+
+_sw_fill_kernel = None
+
+
+def is_available():
+    """True when CuPy can see a CUDA device"""
+    if cp is None:
+        return False
+    try:
+        return cp.cuda.runtime.getDeviceCount() > 0
+    except Exception:
+        return False
+
+
+def _get_kernel():
+    global _sw_fill_kernel
+    if _sw_fill_kernel is None:
+        _sw_fill_kernel = cp.RawKernel(_SW_FILL_SRC, 'sw_fill')
+    return _sw_fill_kernel
+
+
+def sw_fill_gpu(S, gap_open, gap_extend, score_threshold, mask,
+                threads_per_block=256):
+    """
+    Run the SW fill on the GPU and return the same tuple as the CPU
+    kernels: (H, traceback, max_score, max_i, max_j) as host arrays.
+
+    Args:
+        S (numpy.ndarray): Similarity matrix (n_human x n_bact), float32
+        gap_open (float): Gap opening penalty
+        gap_extend (float): Gap extension penalty
+        score_threshold (float): Minimum similarity score to consider
+        mask (numpy.ndarray): uint8 bitmap of excluded cells
+        threads_per_block (int): CUDA block width for the wavefront
+
+    Returns:
+        tuple: (H, traceback, max_score, max_i, max_j)
+    """
+    n_human, n_bact = S.shape
+    S_d = cp.asarray(np.ascontiguousarray(S, dtype=np.float32))
+    mask_d = cp.asarray(np.ascontiguousarray(mask, dtype=np.uint8))
+    H_d = cp.zeros((n_human + 1, n_bact + 1), dtype=cp.float32)
+    E_d = cp.full((n_human + 1, n_bact + 1), -cp.inf, dtype=cp.float32)
+    F_d = cp.full((n_human + 1, n_bact + 1), -cp.inf, dtype=cp.float32)
+    tb_d = cp.zeros((n_human + 1, n_bact + 1), dtype=cp.int8)
+
+    _get_kernel()((1,), (threads_per_block,),
+                  (S_d, mask_d, H_d, E_d, F_d, tb_d,
+                   np.int32(n_human), np.int32(n_bact),
+                   np.float32(gap_open), np.float32(gap_extend),
+                   np.float32(score_threshold)))
+
+    flat = int(cp.argmax(H_d))
+    max_i, max_j = divmod(flat, n_bact + 1)
+    H = cp.asnumpy(H_d)
+    traceback = cp.asnumpy(tb_d)
+    return H, traceback, float(H[max_i, max_j]), max_i, max_j
@@ -1,12 +1,14 @@
 """
 Flask application for protein alignment analysis
 """
+from concurrent.futures import ThreadPoolExecutor
+
 from flask import Flask, render_template, request, jsonify
 
 # Import custom modules
 from protein_utils import fetch_protein_sequence
 from chunking import get_or_create_chunks
-from embeddings import get_or_create_embeddings, compute_similarity_matrix
+from embeddings import get_or_create_embeddings, get_or_create_similarity_matrix
 from alignment import smith_waterman_chunks
 from descriptors import get_or_create_descriptors
 from interpretation import interpret_alignment
@@ -60,33 +62,45 @@ def analyze():
         print(f"  Human chunks: {len(human_chunks)}")
         print(f"  Bacteria chunks: {len(bact_chunks)}\n")
         
-        # Step 3: Get or create embeddings
-        print("Step 3: Computing embeddings...")
-        human_emb = get_or_create_embeddings(human_chunks, human_id)
-        bact_emb = get_or_create_embeddings(bact_chunks, bact_id)
+        # Steps 3/6/6b have no data dependency on each other and spend
+        # their time in I/O, numpy, or subprocesses that release the GIL,
+        # so run all six tasks concurrently (wall time = max, not sum)
+        print("Steps 3/6/6b: Computing embeddings, descriptors and "
+              "functional annotations in parallel...")
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            human_emb_f = pool.submit(get_or_create_embeddings, human_chunks, human_id)
+            bact_emb_f = pool.submit(get_or_create_embeddings, bact_chunks, bact_id)
+            human_desc_f = pool.submit(get_or_create_descriptors, human_chunks, human_id)
+            bact_desc_f = pool.submit(get_or_create_descriptors, bact_chunks, bact_id)
+            human_func_f = pool.submit(compute_functional_annotations, human_seq, human_id)
+            bact_func_f = pool.submit(compute_functional_annotations, bact_seq, bact_id)
+
+            human_emb = human_emb_f.result()
+            bact_emb = bact_emb_f.result()
         print(f"  Embeddings computed\n")
-        
+
         # Step 4: Compute similarity matrix
         print("Step 4: Computing similarity matrix...")
-        similarity_matrix = compute_similarity_matrix(human_emb, bact_emb)
+        similarity_matrix = get_or_create_similarity_matrix(
+            human_emb, bact_emb, human_id, bact_id)
         print(f"  Similarity matrix shape: {similarity_matrix.shape}\n")
         
         # Step 5: Smith-Waterman alignment
         print("Step 5: Running Smith-Waterman alignment...")
-        score, alignment, _ = smith_waterman_chunks(similarity_matrix)
+        score, alignment = smith_waterman_chunks(similarity_matrix)
         print(f"  Alignment score: {score:.2f}")
         print(f"  Aligned chunks: {len(alignment)}\n")
         
-        # Step 6: Get or create descriptors
-        print("Step 6: Computing biochemical descriptors...")
-        human_descriptors = get_or_create_descriptors(human_chunks, human_id)
-        bact_descriptors = get_or_create_descriptors(bact_chunks, bact_id)
+        # Step 6: Collect descriptors (computed in parallel above)
+        print("Step 6: Collecting biochemical descriptors...")
+        human_descriptors = human_desc_f.result()
+        bact_descriptors = bact_desc_f.result()
         print(f"  Descriptors computed\n")
-        
-        # Step 6b: Compute functional annotations (Pfam, Prosite, Signal peptide, TM)
-        print("Step 6b: Computing functional annotations...")
-        human_functional = compute_functional_annotations(human_seq, human_id)
-        bact_functional = compute_functional_annotations(bact_seq, bact_id)
+
+        # Step 6b: Collect functional annotations (Pfam, Prosite, Signal peptide, TM)
+        print("Step 6b: Collecting functional annotations...")
+        human_functional = human_func_f.result()
+        bact_functional = bact_func_f.result()
         domain_overlap = check_domain_overlap(
             human_functional.get('pfam_domains', []),
             bact_functional.get('pfam_domains', [])
@@ -1,6 +1,9 @@
 """Protein sequence chunking functionality"""
 import os
+import threading
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from config import (CHUNK_LEN, CHUNK_STRIDE, CACHE_DIR, 
                    MASTER_CHUNKS_DIR, HUMAN_CHUNKS_FILE, BACTERIA_CHUNKS_FILE)
 from protein_utils import sanitize_protein_id
@@ -25,47 +28,49 @@ def chunk_protein(protein_id, sequence, chunk_len=CHUNK_LEN, stride=CHUNK_STRIDE
     Returns:
         pd.DataFrame: DataFrame with columns [protein_id, chunk_index, start, end, chunk_seq]
     """
-    chunks = []
     L = len(sequence)
-    
+
     # Handle short sequences
     if L <= chunk_len:
-        chunks.append({
-            'protein_id': protein_id,
-            'chunk_index': 0,
-            'start': 1,
-            'end': L,
-            'chunk_seq': sequence
-        })
+        starts = np.zeros(1, dtype=np.int64)
+        ends = np.array([L], dtype=np.int64)
     else:
-        start = 0
-        chunk_index = 0
-        
-        while start < L:
-            end = min(start + chunk_len, L)
-            subseq = sequence[start:end]
-            
-            chunks.append({
-                'protein_id': protein_id,
-                'chunk_index': chunk_index,
-                'start': start + 1,  # 1-indexed
-                'end': end,
-                'chunk_seq': subseq
-            })
-            
-            chunk_index += 1
-            start += stride
-            
-            if end == L:
-                break
-    
-    return pd.DataFrame(chunks)
+        # All chunk boundaries at once instead of a dict-append loop;
+        # chunking stops after the first chunk that reaches the sequence end
+        starts = np.arange(0, L, stride, dtype=np.int64)
+        ends = np.minimum(starts + chunk_len, L)
+        hits = np.flatnonzero(ends == L)
+        if hits.size:
+            starts = starts[:hits[0] + 1]
+            ends = ends[:hits[0] + 1]
+
+    # C-level string slicing in a single comprehension
+    chunk_seqs = [sequence[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+
+    return pd.DataFrame({
+        'protein_id': protein_id,
+        'chunk_index': np.arange(len(starts)),
+        'start': starts + 1,  # 1-indexed
+        'end': ends,
+        'chunk_seq': chunk_seqs
+    })
+
+
+def _sidecar_path(master_file_path, protein_id):
+    """Per-protein parquet path next to the master file"""
+    stem, ext = os.path.splitext(master_file_path)
+    return f"{stem}_{sanitize_protein_id(protein_id)}{ext}"
+
+
+# Process-wide memo so warm repeat analyses skip the parquet round trip
+_MEM_CACHE = {}
+_MEM_CACHE_LOCK = threading.Lock()
 
 
 def get_or_create_chunks(protein_id, sequence, organism, master_file_path=None):
     """
     Get chunks from master parquet file or create new ones and append
-    
+
     Args:
         protein_id (str): Protein identifier
         sequence (str): Protein sequence
@@ -75,6 +80,21 @@ def get_or_create_chunks(protein_id, sequence, organism, master_file_path=None):
     Returns:
         pd.DataFrame: Chunks dataframe for this protein
     """
+    clean_id = sanitize_protein_id(protein_id)
+    with _MEM_CACHE_LOCK:
+        if clean_id in _MEM_CACHE:
+            print(f"Loading chunks for {clean_id} from memory...")
+            return _MEM_CACHE[clean_id]
+
+    chunks_df = _load_or_create_chunks(protein_id, sequence, organism,
+                                       master_file_path)
+    with _MEM_CACHE_LOCK:
+        _MEM_CACHE[clean_id] = chunks_df
+    return chunks_df
+
+
+def _load_or_create_chunks(protein_id, sequence, organism, master_file_path):
+    """Disk-backed lookup behind the in-memory memo above"""
     # Determine master file path
     if master_file_path is None:
         master_filename = MASTER_FILES.get(organism.lower())
@@ -88,30 +108,40 @@ def get_or_create_chunks(protein_id, sequence, organism, master_file_path=None):
     # Try to load from master file
     if master_file_path and os.path.exists(master_file_path):
         print(f"Checking master file: {master_file_path}")
+        sidecar_path = _sidecar_path(master_file_path, protein_id)
         try:
-            master_df = pd.read_parquet(master_file_path)
-            
-            # Check if protein exists in master file
-            if 'protein_id' in master_df.columns:
-                protein_chunks = master_df[master_df['protein_id'] == protein_id]
-                
+            # Proteins added after the master was built live in sidecar files
+            if os.path.exists(sidecar_path):
+                protein_chunks = pd.read_parquet(sidecar_path)
+                print(f"✓ Found {len(protein_chunks)} chunks for {protein_id} in sidecar file")
+                return protein_chunks.reset_index(drop=True)
+
+            # Pushdown filter: parquet row-group statistics let pyarrow skip
+            # every row group that cannot contain this protein, so the read
+            # is O(rows for this protein) instead of a full master reload
+            if 'protein_id' in pq.read_schema(master_file_path).names:
+                protein_chunks = pq.read_table(
+                    master_file_path,
+                    filters=[('protein_id', '=', protein_id)]
+                ).to_pandas()
+
                 if not protein_chunks.empty:
                     print(f"✓ Found {len(protein_chunks)} chunks for {protein_id} in master file")
                     return protein_chunks.reset_index(drop=True)
                 else:
                     print(f"✗ Protein {protein_id} not found in master file")
-            
+
             # Protein not found - create new chunks
             print(f"Creating new chunks for {protein_id}...")
             new_chunks = chunk_protein(protein_id, sequence)
             new_chunks['organism'] = organism
-            
-            # Append to master file
-            print(f"Appending {len(new_chunks)} chunks to master file...")
-            combined_df = pd.concat([master_df, new_chunks], ignore_index=True)
-            combined_df.to_parquet(master_file_path, index=False)
-            print(f"✓ Saved to master file (total proteins: {combined_df['protein_id'].nunique()})")
-            
+
+            # Append as a sidecar file: O(new_chunks) instead of the old
+            # concat + full master rewrite, which was O(total_proteins)
+            print(f"Appending {len(new_chunks)} chunks as sidecar file...")
+            new_chunks.to_parquet(sidecar_path, index=False)
+            print(f"✓ Saved sidecar file: {os.path.basename(sidecar_path)}")
+
             return new_chunks
             
         except Exception as e:
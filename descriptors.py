@@ -1,12 +1,122 @@
 """Biochemical and structural descriptor computation"""
 import os
+import numpy as np
 import pandas as pd
-import math
 from Bio.SeqUtils.ProtParam import ProteinAnalysis
-from collections import Counter
+from Bio.SeqUtils import ProtParamData, IsoelectricPoint
+import threading
+
+try:
+    from numba import njit  # type: ignore
+except ImportError:
+    # numba is optional; the scalar path falls back to ProteinAnalysis
+    njit = None
 from config import CACHE_DIR
 from protein_utils import sanitize_protein_id
 
+# Process-wide memo so warm repeat analyses skip the disk round trip
+_MEM_CACHE = {}
+_MEM_CACHE_LOCK = threading.Lock()
+
+# -----------------------------------------------------------------------------
+# Lookup tables for the vectorized descriptor pipeline.
+# Residues are encoded as ord(aa) - ord('A') (0..25); code 26 is padding, so
+# every table has 27 entries (or a 27x27 matrix) with zeros in the pad slot.
+# Values are taken from BioPython's own data tables so the vectorized path
+# reproduces ProteinAnalysis results exactly.
+# -----------------------------------------------------------------------------
+_N_CODES = 27
+_PAD_CODE = 26
+_STANDARD_AAS = 'ACDEFGHIKLMNPQRSTVWY'
+
+
+def _aa_mask(aas):
+    mask = np.zeros(_N_CODES, dtype=np.float64)
+    for aa in aas:
+        mask[ord(aa) - 65] = 1.0
+    return mask
+
+
+_AROMATIC_MASK = _aa_mask('FWY')
+_ALIPHATIC_MASK = _aa_mask('AVLIM')
+_HYDROPHOBIC_MASK = _aa_mask('AVLIMFWP')
+_POLAR_MASK = _aa_mask('STNQCY')
+_POSITIVE_MASK = _aa_mask('KRH')
+_NEGATIVE_MASK = _aa_mask('DE')
+
+_KD_TABLE = np.zeros(_N_CODES, dtype=np.float64)
+for _aa, _v in ProtParamData.kd.items():
+    _KD_TABLE[ord(_aa) - 65] = _v
+
+_DIWV_TABLE = np.zeros((_N_CODES, _N_CODES), dtype=np.float64)
+for _aa, _row in ProtParamData.DIWV.items():
+    for _bb, _v in _row.items():
+        _DIWV_TABLE[ord(_aa) - 65, ord(_bb) - 65] = _v
+
+# Henderson-Hasselbalch partial charges at pH 7 per residue (side chains),
+# plus per-residue N-/C-terminal pKs matching Bio.SeqUtils.IsoelectricPoint
+_POS_PARTIAL7 = np.zeros(_N_CODES, dtype=np.float64)
+for _aa, _pk in IsoelectricPoint.positive_pKs.items():
+    if len(_aa) == 1:
+        _POS_PARTIAL7[ord(_aa) - 65] = 1.0 / (10 ** (7.0 - _pk) + 1.0)
+_NEG_PARTIAL7 = np.zeros(_N_CODES, dtype=np.float64)
+for _aa, _pk in IsoelectricPoint.negative_pKs.items():
+    if len(_aa) == 1:
+        _NEG_PARTIAL7[ord(_aa) - 65] = 1.0 / (10 ** (_pk - 7.0) + 1.0)
+
+_NTERM_PK = np.full(_N_CODES, IsoelectricPoint.positive_pKs['Nterm'])
+for _aa, _pk in IsoelectricPoint.pKnterminal.items():
+    _NTERM_PK[ord(_aa) - 65] = _pk
+_CTERM_PK = np.full(_N_CODES, IsoelectricPoint.negative_pKs['Cterm'])
+for _aa, _pk in IsoelectricPoint.pKcterminal.items():
+    _CTERM_PK[ord(_aa) - 65] = _pk
+
+# Byte-level validity mask used to strip non-standard residues
+_VALID_BYTE = np.zeros(256, dtype=bool)
+for _aa in _STANDARD_AAS:
+    _VALID_BYTE[ord(_aa)] = True
+
+
+def _bio_scalars_impl(codes):
+    """
+    GRAVY, aromaticity, instability index and charge at pH 7 from residue
+    codes in one native pass.
+
+    These four are the descriptors the scalar path still delegated to
+    ProteinAnalysis; the formulas mirror compute_descriptors_batch (and
+    therefore BioPython's own tables) exactly, but as tight loops numba
+    compiles instead of per-call ProteinAnalysis object construction.
+    """
+    L = codes.shape[0]
+    kd_sum = 0.0
+    aromatic = 0.0
+    pos = 0.0
+    neg = 0.0
+    for i in range(L):
+        c = codes[i]
+        kd_sum += _KD_TABLE[c]
+        aromatic += _AROMATIC_MASK[c]
+        pos += _POS_PARTIAL7[c]
+        neg += _NEG_PARTIAL7[c]
+
+    instability = 0.0
+    for i in range(L - 1):
+        instability += _DIWV_TABLE[codes[i], codes[i + 1]]
+
+    charge = (pos - neg
+              + 1.0 / (10.0 ** (7.0 - _NTERM_PK[codes[0]]) + 1.0)
+              - 1.0 / (10.0 ** (_CTERM_PK[codes[L - 1]] - 7.0) + 1.0))
+
+    return kd_sum / L, aromatic / L, instability * 10.0 / L, charge
+
+
+if njit is not None:
+    _bio_scalars = njit(cache=True, boundscheck=False)(_bio_scalars_impl)
+    # Warm the (disk-cached) compile so the first real chunk doesn't pay it
+    _bio_scalars(np.zeros(2, dtype=np.uint8))
+else:
+    _bio_scalars = None
+
 
 def compute_chunk_descriptors(sequence, include_structural=False):
     """
@@ -41,67 +151,64 @@ def compute_chunk_descriptors(sequence, include_structural=False):
                           "disorder_fraction": 0.0, "surface_exposed_fraction": 0.5})
         return default
     
-    try:
-        analysis = ProteinAnalysis(clean_seq)
-    except:
-        fallback = {
-            "length": len(sequence), "aromaticity": 0.0, "aliphatic_fraction": 0.0,
-            "GRAVY": 0.0, "hydrophobic_fraction": 0.0, "polar_fraction": 0.0,
-            "instability_index": 0.0, "charge_at_pH7": 0.0, "positive_fraction": 0.0,
-            "negative_fraction": 0.0, "shannon_entropy": 0.0
-        }
-        if include_structural:
-            fallback.update({"helix_fraction": 0.0, "sheet_fraction": 0.0,
-                           "disorder_fraction": 0.0, "surface_exposed_fraction": 0.5})
-        return fallback
-    
     L = len(clean_seq)
-    
-    # Residue groups
-    aliphatic = set('AVLIM')
-    hydrophobic = set('AVLIMFWP')
-    polar = set('STNQCY')
-    positive = set('KRH')
-    negative = set('DE')
-    
-    aa_counts = Counter(clean_seq)
-    aliphatic_count = sum(aa_counts.get(aa, 0) for aa in aliphatic)
-    hydrophobic_count = sum(aa_counts.get(aa, 0) for aa in hydrophobic)
-    polar_count = sum(aa_counts.get(aa, 0) for aa in polar)
-    positive_count = sum(aa_counts.get(aa, 0) for aa in positive)
-    negative_count = sum(aa_counts.get(aa, 0) for aa in negative)
-    
-    # Shannon entropy
-    def shannon_entropy(seq):
-        counts = Counter(seq)
-        total = len(seq)
-        entropy = 0.0
-        for count in counts.values():
-            if count > 0:
-                p = count / total
-                entropy -= p * math.log2(p)
-        return entropy
-    
-    # Build result with BioPython methods (matching notebook exactly)
+
+    # One bincount over residue codes replaces the Counter plus per-group
+    # hash lookups; group counts become dot products with the module masks
+    codes = np.frombuffer(clean_seq.encode('ascii'), dtype=np.uint8) - 65
+    hist = np.bincount(codes, minlength=_N_CODES).astype(np.float64)
+    aliphatic_count = hist @ _ALIPHATIC_MASK
+    hydrophobic_count = hist @ _HYDROPHOBIC_MASK
+    polar_count = hist @ _POLAR_MASK
+    positive_count = hist @ _POSITIVE_MASK
+    negative_count = hist @ _NEGATIVE_MASK
+
+    # Shannon entropy from the same histogram
+    p = hist[hist > 0] / L
+    entropy = float(-(p * np.log2(p)).sum())
+
+    # The remaining four descriptors come from the jitted kernel when
+    # numba is available, else from ProteinAnalysis (same tables either way)
+    if _bio_scalars is not None:
+        gravy, aromaticity, instability, charge = _bio_scalars(codes)
+    else:
+        try:
+            analysis = ProteinAnalysis(clean_seq)
+            gravy = analysis.gravy()
+            aromaticity = analysis.aromaticity()
+            instability = analysis.instability_index()
+            charge = analysis.charge_at_pH(7.0)
+        except:
+            fallback = {
+                "length": len(sequence), "aromaticity": 0.0, "aliphatic_fraction": 0.0,
+                "GRAVY": 0.0, "hydrophobic_fraction": 0.0, "polar_fraction": 0.0,
+                "instability_index": 0.0, "charge_at_pH7": 0.0, "positive_fraction": 0.0,
+                "negative_fraction": 0.0, "shannon_entropy": 0.0
+            }
+            if include_structural:
+                fallback.update({"helix_fraction": 0.0, "sheet_fraction": 0.0,
+                               "disorder_fraction": 0.0, "surface_exposed_fraction": 0.5})
+            return fallback
+
     result = {
         "length": len(sequence),
-        "aromaticity": round(analysis.aromaticity(), 4),
+        "aromaticity": round(aromaticity, 4),
         "aliphatic_fraction": round(aliphatic_count / L, 4) if L > 0 else 0.0,
-        "GRAVY": round(analysis.gravy(), 4),
+        "GRAVY": round(gravy, 4),
         "hydrophobic_fraction": round(hydrophobic_count / L, 4) if L > 0 else 0.0,
         "polar_fraction": round(polar_count / L, 4) if L > 0 else 0.0,
-        "instability_index": round(analysis.instability_index(), 4),
-        "charge_at_pH7": round(analysis.charge_at_pH(7.0), 4),
+        "instability_index": round(instability, 4),
+        "charge_at_pH7": round(charge, 4),
         "positive_fraction": round(positive_count / L, 4) if L > 0 else 0.0,
         "negative_fraction": round(negative_count / L, 4) if L > 0 else 0.0,
-        "shannon_entropy": round(shannon_entropy(clean_seq), 4)
+        "shannon_entropy": round(entropy, 4)
     }
-    
+
     # Add structural descriptors (simplified - not using ESM2 structural prediction)
     if include_structural:
         # Use BioPython's secondary structure prediction as approximation
         try:
-            ss = analysis.secondary_structure_fraction()
+            ss = ProteinAnalysis(clean_seq).secondary_structure_fraction()
             result.update({
                 "helix_fraction": round(ss[0], 4),
                 "sheet_fraction": round(ss[2], 4),
@@ -115,6 +222,95 @@ def compute_chunk_descriptors(sequence, include_structural=False):
     return result
 
 
+def compute_descriptors_batch(sequences):
+    """
+    Compute the 11 biochemical descriptors for many chunks at once.
+
+    All chunk sequences are packed into a single (n_chunks, max_len) uint8
+    code matrix and every descriptor becomes a NumPy column operation over
+    lookup tables (residue-class masks, Kyte-Doolittle values, the DIWV
+    dipeptide matrix, Henderson-Hasselbalch partial charges). No per-chunk
+    Python loop, no per-chunk ProteinAnalysis object. Values match
+    compute_chunk_descriptors exactly.
+
+    Args:
+        sequences (list): List of chunk sequences
+
+    Returns:
+        pd.DataFrame: One row of descriptors per input sequence
+    """
+    n = len(sequences)
+    raw_lengths = np.array([len(s) for s in sequences], dtype=np.int64)
+
+    # Clean + encode: keep only standard residues, code them 0..25, pad to
+    # a rectangle with the pad code (all LUTs are zero in the pad slot)
+    cleaned = []
+    for seq in sequences:
+        b = np.frombuffer(seq.upper().encode('ascii', 'ignore'), dtype=np.uint8)
+        cleaned.append(b[_VALID_BYTE[b]])
+    clean_lengths = np.array([len(c) for c in cleaned], dtype=np.int64)
+    max_len = max(int(clean_lengths.max()), 2) if n else 2
+
+    codes = np.full((n, max_len), _PAD_CODE, dtype=np.int64)
+    for row, c in enumerate(cleaned):
+        codes[row, :len(c)] = c - 65
+
+    # Per-row residue histogram over the 27 codes
+    hist = np.zeros((n, _N_CODES), dtype=np.float64)
+    row_idx = np.repeat(np.arange(n), max_len)
+    np.add.at(hist, (row_idx, codes.ravel()), 1.0)
+    hist[:, _PAD_CODE] = 0.0
+
+    L = np.maximum(clean_lengths, 1).astype(np.float64)
+
+    aromaticity = hist @ _AROMATIC_MASK / L
+    aliphatic_fraction = hist @ _ALIPHATIC_MASK / L
+    gravy = hist @ _KD_TABLE / L
+    hydrophobic_fraction = hist @ _HYDROPHOBIC_MASK / L
+    polar_fraction = hist @ _POLAR_MASK / L
+    positive_fraction = hist @ _POSITIVE_MASK / L
+    negative_fraction = hist @ _NEGATIVE_MASK / L
+
+    # Instability index: sum of DIWV dipeptide weights scaled by 10/L.
+    # Pad pairs contribute zero because the pad row/column of the table is 0
+    instability = _DIWV_TABLE[codes[:, :-1], codes[:, 1:]].sum(axis=1) * 10.0 / L
+
+    # Charge at pH 7: side-chain partial charges from the histogram plus
+    # the sequence-specific N-/C-terminal contributions
+    first = codes[np.arange(n), 0]
+    last = codes[np.arange(n), np.maximum(clean_lengths - 1, 0)]
+    charge = (hist @ _POS_PARTIAL7 - hist @ _NEG_PARTIAL7
+              + 1.0 / (10 ** (7.0 - _NTERM_PK[first]) + 1.0)
+              - 1.0 / (10 ** (_CTERM_PK[last] - 7.0) + 1.0))
+
+    # Shannon entropy from the same histogram
+    p = hist / L[:, None]
+    entropy = -np.where(p > 0, p * np.log2(np.where(p > 0, p, 1.0)), 0.0).sum(axis=1)
+
+    result = pd.DataFrame({
+        'length': raw_lengths,
+        'aromaticity': np.round(aromaticity, 4),
+        'aliphatic_fraction': np.round(aliphatic_fraction, 4),
+        'GRAVY': np.round(gravy, 4),
+        'hydrophobic_fraction': np.round(hydrophobic_fraction, 4),
+        'polar_fraction': np.round(polar_fraction, 4),
+        'instability_index': np.round(instability, 4),
+        'charge_at_pH7': np.round(charge, 4),
+        'positive_fraction': np.round(positive_fraction, 4),
+        'negative_fraction': np.round(negative_fraction, 4),
+        'shannon_entropy': np.round(entropy, 4),
+    })
+
+    # Chunks too short for analysis get the same defaults as the scalar path
+    too_short = clean_lengths < 2
+    if too_short.any():
+        for col in result.columns:
+            if col != 'length':
+                result.loc[too_short, col] = 0.0
+
+    return result
+
+
 def get_or_create_descriptors(chunks_df, protein_id):
     """
     Get descriptors from cache or compute new ones
@@ -127,28 +323,29 @@ def get_or_create_descriptors(chunks_df, protein_id):
         pd.DataFrame: DataFrame with descriptors for each chunk
     """
     clean_id = sanitize_protein_id(protein_id)
+    with _MEM_CACHE_LOCK:
+        if clean_id in _MEM_CACHE:
+            print(f"Loading descriptors for {clean_id} from memory...")
+            return _MEM_CACHE[clean_id]
+
     cache_file = os.path.join(CACHE_DIR, f"{clean_id}_descriptors.parquet")
-    
+
     # Load from cache if exists
     if os.path.exists(cache_file):
         print(f"Loading descriptors for {clean_id} from cache...")
-        return pd.read_parquet(cache_file)
-    
-    # Compute new descriptors
-    print(f"Computing descriptors for {clean_id} ({len(chunks_df)} chunks)...")
-    descriptors_list = []
-    
-    for idx, row in chunks_df.iterrows():
-        desc = compute_chunk_descriptors(row['chunk_seq'])
-        desc['chunk_index'] = row['chunk_index']
-        descriptors_list.append(desc)
-    
-    descriptors_df = pd.DataFrame(descriptors_list)
-    
-    # Save to cache
-    descriptors_df.to_parquet(cache_file, index=False)
-    print(f"Saved descriptors to cache")
-    
+        descriptors_df = pd.read_parquet(cache_file)
+    else:
+        # Compute new descriptors in one vectorized pass over all chunks
+        print(f"Computing descriptors for {clean_id} ({len(chunks_df)} chunks)...")
+        descriptors_df = compute_descriptors_batch(chunks_df['chunk_seq'].tolist())
+        descriptors_df['chunk_index'] = chunks_df['chunk_index'].to_numpy()
+
+        # Save to cache
+        descriptors_df.to_parquet(cache_file, index=False)
+        print(f"Saved descriptors to cache")
+
+    with _MEM_CACHE_LOCK:
+        _MEM_CACHE[clean_id] = descriptors_df
     return descriptors_df
 
 
@@ -1,42 +1,63 @@
 """Embedding computation and caching"""
 import os
+import threading
 import numpy as np
 from config import CACHE_DIR
 from models import compute_embeddings
 from protein_utils import sanitize_protein_id
 
+# Process-wide memo so warm repeat analyses skip the disk round trip
+_MEM_CACHE = {}
+_MEM_CACHE_LOCK = threading.Lock()
+
 
 def get_or_create_embeddings(chunks_df, protein_id):
     """
     Get embeddings from cache or compute new ones
-    
+
     Args:
         chunks_df (pd.DataFrame): DataFrame containing chunks with 'chunk_seq' column
         protein_id (str): Protein identifier for caching
-        
+
     Returns:
         numpy.ndarray: Embeddings matrix (n_chunks x embedding_dim)
     """
     clean_id = sanitize_protein_id(protein_id)
+    with _MEM_CACHE_LOCK:
+        if clean_id in _MEM_CACHE:
+            print(f"Loading embeddings for {clean_id} from memory...")
+            return _MEM_CACHE[clean_id]
+
     cache_file = os.path.join(CACHE_DIR, f"{clean_id}_embeddings.npy")
-    
+
     # Load from cache if exists
     if os.path.exists(cache_file):
         print(f"Loading embeddings for {clean_id} from cache...")
-        return np.load(cache_file)
-    
-    # Compute new embeddings
-    print(f"Computing embeddings for {clean_id} ({len(chunks_df)} chunks)...")
-    sequences = chunks_df['chunk_seq'].tolist()
-    embeddings = compute_embeddings(sequences)
-    
-    # Save to cache
-    np.save(cache_file, embeddings)
-    print(f"Saved embeddings to cache (shape: {embeddings.shape})")
-    
+        # Normalize here too so caches written before unit-norm storage
+        # still satisfy the compute_similarity_matrix contract
+        embeddings = _normalize_rows(np.load(cache_file))
+    else:
+        # Compute new embeddings
+        print(f"Computing embeddings for {clean_id} ({len(chunks_df)} chunks)...")
+        sequences = chunks_df['chunk_seq'].tolist()
+        embeddings = _normalize_rows(
+            compute_embeddings(sequences).astype(np.float32))
+
+        # Save to cache (unit-norm float32, so similarity is a single GEMM)
+        np.save(cache_file, embeddings)
+        print(f"Saved embeddings to cache (shape: {embeddings.shape})")
+
+    with _MEM_CACHE_LOCK:
+        _MEM_CACHE[clean_id] = embeddings
     return embeddings
 
 
+def _normalize_rows(embeddings):
+    """Scale each embedding to unit L2 norm (in place for float arrays)"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / (norms + 1e-8)
+
+
 def compute_similarity_matrix(embeddings1, embeddings2):
     """
     Compute cosine similarity matrix between two sets of embeddings
@@ -45,15 +66,51 @@ def compute_similarity_matrix(embeddings1, embeddings2):
         embeddings1 (numpy.ndarray): First set of embeddings (n1 x dim)
         embeddings2 (numpy.ndarray): Second set of embeddings (n2 x dim)
         
+    Embeddings are stored unit-norm by get_or_create_embeddings, so the
+    cosine similarity is a single BLAS GEMM — no per-call norm passes and
+    no materialized norms1 @ norms2.T matrix.
+
     Returns:
         numpy.ndarray: Similarity matrix (n1 x n2)
     """
-    # Compute dot product
-    similarity_matrix = np.dot(embeddings1, embeddings2.T)
-    
-    # Normalize by vector norms (cosine similarity)
-    norms1 = np.linalg.norm(embeddings1, axis=1, keepdims=True)
-    norms2 = np.linalg.norm(embeddings2, axis=1, keepdims=True)
-    similarity_matrix = similarity_matrix / (norms1 @ norms2.T + 1e-8)
-    
-    return similarity_matrix
+    return embeddings1 @ embeddings2.T
+
+
+def get_or_create_similarity_matrix(embeddings1, embeddings2, protein_id1,
+                                    protein_id2):
+    """
+    Similarity matrix for a protein pair, backed by an fp16 memmap cache
+
+    A cached pair is served as a read-only np.memmap: half the footprint
+    of the fp32 GEMM result, demand-paged by the OS, and shared between
+    however many interpretations touch it in one session — the full
+    matrix never has to live resident.
+
+    Args:
+        embeddings1 (numpy.ndarray): First set of embeddings (n1 x dim)
+        embeddings2 (numpy.ndarray): Second set of embeddings (n2 x dim)
+        protein_id1 (str): Identifier of the first protein
+        protein_id2 (str): Identifier of the second protein
+
+    Returns:
+        numpy.ndarray: Similarity matrix (n1 x n2); an fp16 memmap on a
+        cache hit, the freshly computed fp32 array on a miss
+    """
+    id1 = sanitize_protein_id(protein_id1)
+    id2 = sanitize_protein_id(protein_id2)
+    n1, n2 = embeddings1.shape[0], embeddings2.shape[0]
+    # Shape in the filename doubles as the header, so loads need no sidecar
+    cache_file = os.path.join(
+        CACHE_DIR, f"{id1}_{id2}_similarity_{n1}x{n2}.f16")
+
+    if os.path.exists(cache_file):
+        print(f"Loading similarity matrix for {id1} vs {id2} from memmap cache...")
+        return np.memmap(cache_file, dtype=np.float16, mode='r', shape=(n1, n2))
+
+    similarity = compute_similarity_matrix(embeddings1, embeddings2)
+    # Write-then-rename so a crash mid-write never leaves a truncated
+    # file that every later memmap load would choke on
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    similarity.astype(np.float16).tofile(tmp_file)
+    os.replace(tmp_file, cache_file)
+    return similarity
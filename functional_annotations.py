@@ -1,15 +1,69 @@
 """Functional annotations: Pfam domains, Prosite motifs, Signal peptide, TM helices"""
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import re
 import os
+import hashlib
+import json
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    # orjson is optional; stdlib json keeps the cache working without it
+    orjson = None
+
+try:
+    from numba import njit  # type: ignore
+except ImportError:
+    # numba is optional; the pure-Python TM scan still works without it
+    njit = None
+
+try:
+    import ijson  # type: ignore
+except ImportError:
+    # ijson is optional; large Prosite batches fall back to response.json()
+    ijson = None
+import atexit
+import logging
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from config import CACHE_DIR
 from protein_utils import sanitize_protein_id
 
+# Lazy %s-style logging: no message string is built when the level is
+# above INFO, unlike the print(f"...") calls this module used to make
+logger = logging.getLogger(__name__)
+
+# Shared HTTP session: keep-alive skips the TLS handshake on every call
+# after the first, and transient failures are retried with backoff
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=8, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5)))
+SESSION.headers.update({'Accept-Encoding': 'gzip'})
+
 # Cache for functional annotations
 FUNC_CACHE_DIR = os.path.join(CACHE_DIR, "functional")
 os.makedirs(FUNC_CACHE_DIR, exist_ok=True)
 
 
+def _loads(data):
+    """Deserialize cache bytes with orjson when available"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _dumps(obj):
+    """Serialize to cache bytes with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
 # =============================================================================
 # 1. PFAM DOMAINS - Local PfamScan via WSL (matching notebook)
 # =============================================================================
@@ -43,59 +97,135 @@ def parse_pfam_output(output_file):
                     if pfam_acc.startswith('PF') and pfam_acc not in domains:
                         domains.append(pfam_acc)
     except Exception as e:
-        print(f"    Error parsing Pfam output: {e}")
+        logger.warning("Error parsing Pfam output: %s", e)
     
     return domains
 
 
+class _PfamScanWorker:
+    """
+    Long-lived WSL shell for PfamScan runs.
+
+    The old path paid three process launches per protein (two `wslpath`
+    calls plus `wsl bash -c`). The worker keeps one `wsl bash` alive,
+    translates the temp directory path once, and sends each scan as a
+    single command line followed by a sentinel echoing the exit code.
+    The shell is started lazily on the first scan and restarted if it
+    dies or times out.
+    """
+
+    _SENTINEL = '__PFAM_DONE__'
+
+    def __init__(self):
+        self._proc = None
+        self._lines = None
+        self._wsl_temp_dir = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pump(stream, lines):
+        for line in stream:
+            lines.put(line.rstrip('\n'))
+        lines.put(None)
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            ['wsl', 'bash'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._pump, args=(self._proc.stdout, self._lines), daemon=True
+        ).start()
+        # Translate the temp dir once; per-file paths are just basename joins
+        if self._wsl_temp_dir is None:
+            code, output = self._exec(f"wslpath -u '{PFAM_TEMP_DIR}'", timeout=30)
+            if code == 0 and output:
+                self._wsl_temp_dir = output[-1]
+
+    def _exec(self, command, timeout):
+        """Run one command in the shell, return (exit_code, output_lines)"""
+        self._proc.stdin.write(f'{command}; echo "{self._SENTINEL} $?"\n')
+        self._proc.stdin.flush()
+        deadline = time.monotonic() + timeout
+        output = []
+        while True:
+            line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            if line is None:
+                raise RuntimeError("PfamScan worker shell exited")
+            if line.startswith(self._SENTINEL):
+                return int(line.split()[1]), output
+            output.append(line)
+
+    def run_pfam_scan(self, fasta_file, output_file, timeout=120):
+        """Scan one FASTA file, return (exit_code, combined_output_text)"""
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            wsl_fasta = f"{self._wsl_temp_dir}/{os.path.basename(fasta_file)}"
+            wsl_output = f"{self._wsl_temp_dir}/{os.path.basename(output_file)}"
+            cmd = (f"perl -I {PFAM_DIR}/PfamScan {PFAM_SCAN_PATH} "
+                   f"-fasta {wsl_fasta} -dir {PFAM_DIR} -outfile {wsl_output} -cpu 2")
+            try:
+                code, output = self._exec(cmd, timeout)
+            except queue.Empty:
+                # The worker is mid-command and unusable; restart next call
+                self.close()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            return code, '\n'.join(output)
+
+    def close(self):
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+        self._proc = None
+
+
+_PFAM_WORKER = _PfamScanWorker()
+atexit.register(_PFAM_WORKER.close)
+
+# Process-wide memo so warm repeat analyses skip the scan entirely
+_PFAM_MEM_CACHE = {}
+_PFAM_MEM_CACHE_LOCK = threading.Lock()
+
+
 def search_pfam_domains_local(sequence, protein_id="unknown"):
     """
     Search Pfam domains using LOCAL PfamScan via WSL.
     Returns list of Pfam domain accessions.
-    ~2-5 seconds per sequence
+    First call pays the WSL startup; later calls reuse the worker shell.
     """
-    import subprocess
-    
     clean_id = sanitize_protein_id(protein_id)
+    with _PFAM_MEM_CACHE_LOCK:
+        if clean_id in _PFAM_MEM_CACHE:
+            return _PFAM_MEM_CACHE[clean_id]
+
     fasta_file = os.path.join(PFAM_TEMP_DIR, f"{clean_id}.fasta")
     output_file = os.path.join(PFAM_TEMP_DIR, f"{clean_id}_pfam.out")
-    
+
     try:
         # Write sequence to FASTA file
         with open(fasta_file, 'w') as f:
             f.write(f">{clean_id}\n{sequence}\n")
-        
-        # Convert Windows path to WSL path
-        wsl_fasta = subprocess.run(
-            ['wsl', 'wslpath', '-u', fasta_file],
-            capture_output=True, text=True
-        ).stdout.strip()
-        
-        wsl_output = subprocess.run(
-            ['wsl', 'wslpath', '-u', output_file],
-            capture_output=True, text=True
-        ).stdout.strip()
-        
-        # Run PfamScan via WSL (with -I flag for Perl modules)
-        cmd = f"perl -I {PFAM_DIR}/PfamScan {PFAM_SCAN_PATH} -fasta {wsl_fasta} -dir {PFAM_DIR} -outfile {wsl_output} -cpu 2"
-        
-        result = subprocess.run(
-            ['wsl', 'bash', '-c', cmd],
-            capture_output=True, text=True, timeout=120  # Increased timeout
+
+        returncode, scan_output = _PFAM_WORKER.run_pfam_scan(
+            fasta_file, output_file, timeout=120
         )
-        
-        if result.returncode == 0 and os.path.exists(output_file):
+
+        if returncode == 0 and os.path.exists(output_file):
             domains = parse_pfam_output(output_file)
+            with _PFAM_MEM_CACHE_LOCK:
+                _PFAM_MEM_CACHE[clean_id] = domains
             return domains
         else:
-            print(f"    PfamScan error: {result.stderr}")
+            logger.warning("PfamScan error: %s", scan_output)
             return []
-            
+
     except subprocess.TimeoutExpired:
-        print(f"    PfamScan timeout for {protein_id}")
+        logger.warning("PfamScan timeout for %s", protein_id)
         return []
     except Exception as e:
-        print(f"    PfamScan error: {e}")
+        logger.warning("PfamScan error: %s", e)
         # Fallback to API
         return search_pfam_domains_api(protein_id)
 
@@ -110,7 +240,7 @@ def search_pfam_domains_api(protein_id):
     
     try:
         url = f"https://www.ebi.ac.uk/interpro/api/entry/pfam/protein/uniprot/{clean_id}"
-        response = requests.get(url, timeout=30, headers={'Accept': 'application/json'})
+        response = SESSION.get(url, timeout=30, headers={'Accept': 'application/json'})
         
         if response.status_code == 200:
             data = response.json()
@@ -127,7 +257,7 @@ def search_pfam_domains_api(protein_id):
             return []
             
     except Exception as e:
-        print(f"    Pfam API error: {e}")
+        logger.warning("Pfam API error: %s", e)
         return []
 
 
@@ -142,50 +272,150 @@ def search_pfam_domains(sequence, protein_id="unknown"):
 # 2. PROSITE MOTIFS - ScanProsite API (same as notebook)
 # =============================================================================
 
-def search_prosite_motifs(sequence):
+PROSITE_URL = "https://prosite.expasy.org/cgi-bin/prosite/PSScan.cgi"
+
+# Compiled once; the fallback text parser runs it on every failed JSON parse
+_PS_RE = re.compile(r'PS\d{5}')
+
+# Cached entries whose Prosite query failed are retried after this long;
+# genuinely empty results ('ok' status) are honored forever
+_PROSITE_RETRY_TTL = 24 * 3600
+
+
+def search_prosite_motifs_batch(sequences, batch_size=100, with_status=False):
     """
-    Search Prosite motifs using ScanProsite API.
-    Returns list of Prosite pattern accessions.
-    ~0.05 seconds per sequence
+    Search Prosite motifs for many sequences with one POST per batch.
+
+    ScanProsite accepts multi-FASTA input, so each round trip carries up
+    to batch_size sequences instead of one; matches are demultiplexed by
+    the sequence_ac field, which echoes the FASTA header id for pasted
+    input. The batch is halved and retried if the server rejects the
+    request body as too large.
+
+    Args:
+        sequences (dict): Mapping of sequence id -> sequence
+        batch_size (int): Maximum sequences per request
+        with_status (bool): Also return per-sequence query status
+            ('ok', 'timeout' or 'http_error'), so callers can tell a true
+            empty result from a failed lookup
+
+    Returns:
+        dict: Mapping of sequence id -> list of Prosite accessions, or a
+        (results, statuses) pair when with_status is True
     """
-    url = "https://prosite.expasy.org/cgi-bin/prosite/PSScan.cgi"
-    
-    params = {
-        'seq': sequence,
-        'output': 'json',
-        'skip': 'false'
-    }
-    
-    try:
-        response = requests.post(url, data=params, timeout=30)
-        
+    results = {seq_id: [] for seq_id in sequences}
+    statuses = {seq_id: 'ok' for seq_id in sequences}
+    items = list(sequences.items())
+    start = 0
+
+    while start < len(items):
+        batch = items[start:start + batch_size]
+        fasta = ''.join(f">{seq_id}\n{seq}\n" for seq_id, seq in batch)
+        params = {
+            'seq': fasta,
+            'output': 'json',
+            'skip': 'false'
+        }
+
+        try:
+            response = SESSION.post(PROSITE_URL, data=params, stream=True,
+                                    timeout=30)
+        except requests.Timeout as e:
+            logger.warning("Prosite timeout: %s", e)
+            for seq_id, _ in batch:
+                statuses[seq_id] = 'timeout'
+            start += len(batch)
+            continue
+        except Exception as e:
+            logger.warning("Prosite error: %s", e)
+            for seq_id, _ in batch:
+                statuses[seq_id] = 'http_error'
+            start += len(batch)
+            continue
+
+        if response.status_code == 413 and len(batch) > 1:
+            # Request body too large: halve the batch and retry this window
+            batch_size = max(1, batch_size // 2)
+            continue
+
         if response.status_code == 200:
+            by_id = {str(seq_id): seq_id for seq_id, _ in batch}
             try:
-                results = response.json()
-                motifs = []
-                
-                if 'matchset' in results:
-                    for match in results['matchset']:
-                        acc = match.get('signature_ac', '')
-                        if acc and acc not in motifs:
-                            motifs.append(acc)
-                
-                return motifs
+                if ijson is not None:
+                    # Stream-parse matchset entries so a big batch response
+                    # is never held in memory whole
+                    response.raw.decode_content = True
+                    matches = ijson.items(response.raw, 'matchset.item')
+                else:
+                    matches = response.json().get('matchset', [])
+                for match in matches:
+                    seq_ac = str(match.get('sequence_ac', ''))
+                    acc = match.get('signature_ac', '')
+                    if seq_ac in by_id and acc:
+                        results[by_id[seq_ac]].append(acc)
             except:
-                # Fallback: parse text response
-                motifs = []
-                text = response.text
-                pattern = re.findall(r'PS\d{5}', text)
-                for p in pattern:
-                    if p not in motifs:
-                        motifs.append(p)
-                return motifs
+                # Fallback: parse text response (unambiguous only for a
+                # single-sequence batch)
+                if len(batch) == 1:
+                    results[batch[0][0]] = _PS_RE.findall(response.text)
         else:
-            return []
-            
-    except Exception as e:
-        print(f"    Prosite error: {e}")
-        return []
+            for seq_id, _ in batch:
+                statuses[seq_id] = 'http_error'
+
+        start += len(batch)
+
+    # Order-preserving O(n) dedup per sequence
+    results = {seq_id: list(dict.fromkeys(motifs))
+               for seq_id, motifs in results.items()}
+    if with_status:
+        return results, statuses
+    return results
+
+
+def _search_prosite_motifs_with_status(sequence):
+    """Single-sequence search returning (motifs, status)"""
+    results, statuses = search_prosite_motifs_batch(
+        {'query': sequence}, with_status=True)
+    return results.get('query', []), statuses.get('query', 'http_error')
+
+
+def search_prosite_motifs(sequence):
+    """
+    Search Prosite motifs using ScanProsite API.
+    Returns list of Prosite pattern accessions.
+    ~0.05 seconds per sequence
+    """
+    return search_prosite_motifs_batch({'query': sequence}).get('query', [])
+
+
+# =============================================================================
+# SHARED RESIDUE LOOKUP TABLES - built once, indexed by byte value
+# =============================================================================
+
+# Kyte-Doolittle hydrophobicity. The values are multiples of 0.1, so the
+# LUT stores them scaled by 10 as integers — window sums are then exact
+# and threshold comparisons never flip on float rounding at the boundary
+_KD_SCALE = {
+    'A': 1.8, 'R': -4.5, 'N': -3.5, 'D': -3.5, 'C': 2.5,
+    'Q': -3.5, 'E': -3.5, 'G': -0.4, 'H': -3.2, 'I': 4.5,
+    'L': 3.8, 'K': -3.9, 'M': 1.9, 'F': 2.8, 'P': -1.6,
+    'S': -0.8, 'T': -0.7, 'W': -0.9, 'Y': -1.3, 'V': 4.2
+}
+_KD10_LUT = np.zeros(256, dtype=np.int64)
+for _aa, _v in _KD_SCALE.items():
+    _KD10_LUT[ord(_aa)] = round(_v * 10)
+
+# Residue-class membership: hydrophobic set shared by the signal peptide
+# and TM heuristics, positive charge and small residues for the former
+_HYD_LUT = np.zeros(256, dtype=np.int64)
+for _aa in 'AVLIMFWP':
+    _HYD_LUT[ord(_aa)] = 1
+_POSITIVE_LUT = np.zeros(256, dtype=np.uint8)
+for _aa in 'KR':
+    _POSITIVE_LUT[ord(_aa)] = 1
+_SMALL_AA_LUT = np.zeros(256, dtype=np.uint8)
+for _aa in 'AGS':
+    _SMALL_AA_LUT[ord(_aa)] = 1
 
 
 # =============================================================================
@@ -198,86 +428,106 @@ def predict_signal_peptide(sequence):
     - Positive N-region (first 1-5 aa with K, R)
     - Hydrophobic H-region (aa 5-20 with high hydrophobic content)
     - Polar C-region with cleavage site
-    
+
     Returns True if signal peptide detected, False otherwise.
     """
     if len(sequence) < 20:
         return False
-    
-    n_term = sequence[:30].upper()
-    
+
+    # One byte decode, then each region count is a LUT gather + sum with
+    # no per-residue Python iteration. Gates run cheapest-first and bail
+    # out early: most sequences fail the 5-residue positive-charge test,
+    # which costs a fraction of the other two counts
+    n_term = np.frombuffer(sequence[:30].upper().encode('ascii', 'ignore'),
+                           dtype=np.uint8)
+
     # N-region: first 5 aa should have positive charge (K, R)
-    n_region = n_term[:5]
-    positive = sum(1 for aa in n_region if aa in 'KR')
-    
+    if int(_POSITIVE_LUT[n_term[:5]].sum()) < 1:
+        return False
+
     # H-region: aa 5-20 should be hydrophobic
     h_region = n_term[5:20]
-    hydrophobic = set('AVLIMFWP')
-    hydro_count = sum(1 for aa in h_region if aa in hydrophobic)
-    hydro_fraction = hydro_count / len(h_region) if h_region else 0
-    
+    hydro_fraction = int(_HYD_LUT[h_region].sum()) / len(h_region) \
+        if len(h_region) else 0
+    if hydro_fraction < 0.5:
+        return False
+
     # C-region: should have small aa before cleavage (A, G, S)
-    c_region = n_term[15:25]
-    small_aa = sum(1 for aa in c_region if aa in 'AGS')
-    
-    # Decision: signal peptide if all criteria met
-    has_signal = (positive >= 1 and hydro_fraction >= 0.5 and small_aa >= 2)
-    
-    return has_signal
+    return int(_SMALL_AA_LUT[n_term[15:25]].sum()) >= 2
 
 
 # =============================================================================
 # 4. TRANSMEMBRANE HELICES - Heuristic (same as notebook)
 # =============================================================================
 
+def _tm_scan_impl(kd10, hyd, window_size):
+    """
+    Greedy TM helix scan over precomputed per-residue arrays.
+
+    Maintains running window sums (add one residue, drop one) and skips a
+    full window past each hit, exactly like the original Python scan but
+    as a single native loop once numba compiles it. All arithmetic is on
+    the integer-scaled KD values, so thresholds compare exactly.
+    """
+    n = kd10.shape[0]
+    if n < window_size + 1:
+        return 0
+
+    kd_sum = 0
+    hyd_sum = 0
+    for k in range(window_size):
+        kd_sum += kd10[k]
+        hyd_sum += hyd[k]
+
+    tm_count = 0
+    i = 0
+    while i < n - window_size:
+        if kd_sum > 15 * window_size and 5 * hyd_sum > 3 * window_size:
+            tm_count += 1
+            i += window_size
+            if i < n - window_size:
+                kd_sum = 0
+                hyd_sum = 0
+                for k in range(i, i + window_size):
+                    kd_sum += kd10[k]
+                    hyd_sum += hyd[k]
+        else:
+            kd_sum += kd10[i + window_size] - kd10[i]
+            hyd_sum += hyd[i + window_size] - hyd[i]
+            i += 1
+
+    return tm_count
+
+
+if njit is not None:
+    _tm_scan = njit(cache=True, boundscheck=False)(_tm_scan_impl)
+    # Warm the (disk-cached) compile so the first real protein doesn't pay it
+    _tm_scan(np.zeros(20, dtype=np.int64), np.zeros(20, dtype=np.int64), 19)
+else:
+    _tm_scan = _tm_scan_impl
+
+
 def predict_tm_helices(sequence):
     """
     Predict transmembrane helices using hydrophobicity-based heuristic.
-    
+
     TM helices are typically:
     - 17-25 aa long
     - Highly hydrophobic (GRAVY > 1.5)
     - Contain mostly AVLIMFWP residues
-    
+
     Returns number of predicted TM helices.
     """
     if len(sequence) < 20:
         return 0
-    
+
     sequence = sequence.upper()
-    hydrophobic = set('AVLIMFWP')
-    
-    # Kyte-Doolittle hydrophobicity scale
-    kd_scale = {
-        'A': 1.8, 'R': -4.5, 'N': -3.5, 'D': -3.5, 'C': 2.5,
-        'Q': -3.5, 'E': -3.5, 'G': -0.4, 'H': -3.2, 'I': 4.5,
-        'L': 3.8, 'K': -3.9, 'M': 1.9, 'F': 2.8, 'P': -1.6,
-        'S': -0.8, 'T': -0.7, 'W': -0.9, 'Y': -1.3, 'V': 4.2
-    }
-    
-    tm_count = 0
     window_size = 19  # Typical TM helix length
-    
-    i = 0
-    while i < len(sequence) - window_size:
-        window = sequence[i:i + window_size]
-        
-        # Calculate hydrophobicity
-        hydro_sum = sum(kd_scale.get(aa, 0) for aa in window)
-        avg_hydro = hydro_sum / window_size
-        
-        # Calculate hydrophobic fraction
-        hydro_count = sum(1 for aa in window if aa in hydrophobic)
-        hydro_frac = hydro_count / window_size
-        
-        # TM helix criteria
-        if avg_hydro > 1.5 and hydro_frac > 0.6:
-            tm_count += 1
-            i += window_size  # Skip past this helix
-        else:
-            i += 1
-    
-    return tm_count
+
+    # Map residues through the byte LUTs once; the running-sum scan with
+    # the skip-past-helix jump lives in the jitted kernel
+    codes = np.frombuffer(sequence.encode('ascii', 'ignore'), dtype=np.uint8)
+    return int(_tm_scan(_KD10_LUT[codes], _HYD_LUT[codes], window_size))
 
 
 # =============================================================================
@@ -300,80 +550,145 @@ def compute_functional_annotations(sequence, protein_id="unknown", use_cache=Tru
     Returns:
         dict: Dictionary with all functional annotations
     """
-    # Clean protein ID for caching
+    # Key the cache on the sequence itself: identical sequences under
+    # different ids (paralogs, renamed entries) share one cache file
     clean_id = sanitize_protein_id(protein_id)
-    cache_file = os.path.join(FUNC_CACHE_DIR, f"{clean_id}_functional.json")
-    
+    seq_hash = hashlib.blake2b(
+        sequence.encode('ascii', 'ignore'), digest_size=16).hexdigest()
+    cache_file = os.path.join(FUNC_CACHE_DIR, f"{seq_hash}.json")
+    # Sidecar index so the human-readable id still resolves to its hash
+    index_file = os.path.join(FUNC_CACHE_DIR, f"{clean_id}_functional.idx")
+
     # Check cache
     if use_cache and os.path.exists(cache_file):
         try:
-            import json
-            with open(cache_file, 'r') as f:
-                print(f"    Loading functional annotations from cache for {clean_id}")
-                return json.load(f)
+            with open(cache_file, 'rb') as f:
+                cached = _loads(f.read())
+            # A cached empty motif list from a successful query is a real
+            # result and stays valid; one cached during an API failure is
+            # retried once the entry is older than the retry TTL
+            status = cached.get('prosite_status', 'ok')
+            if (status == 'ok' or
+                    time.time() - cached.get('prosite_ts', 0) < _PROSITE_RETRY_TTL):
+                logger.info("Loading functional annotations from cache for %s", clean_id)
+                return cached
+            logger.info("Cached Prosite lookup for %s failed (%s); "
+                        "re-querying", clean_id, status)
         except:
             pass
-    
-    print(f"    Computing functional annotations for {clean_id}...")
-    
+
+    logger.info("Computing functional annotations for %s...", clean_id)
+
     annotations = {
         'pfam_domains': [],
         'prosite_motifs': [],
+        'prosite_status': 'http_error',
+        'prosite_ts': 0,
         'has_signal_peptide': False,
         'tm_helix_count': 0
     }
     
     try:
-        # 1. Pfam domains (local via WSL or API fallback)
-        print(f"      - Searching Pfam domains...")
-        annotations['pfam_domains'] = search_pfam_domains(sequence, protein_id)
-        
-        # 2. Prosite motifs (API)
-        print(f"      - Searching Prosite motifs...")
-        annotations['prosite_motifs'] = search_prosite_motifs(sequence)
-        
-        # 3. Signal peptide (heuristic)
-        print(f"      - Predicting signal peptide...")
-        annotations['has_signal_peptide'] = predict_signal_peptide(sequence)
-        
-        # 4. TM helices (heuristic)
-        print(f"      - Predicting TM helices...")
-        annotations['tm_helix_count'] = predict_tm_helices(sequence)
-        
-        # Save to cache
+        # The four sub-tasks are independent: Pfam and Prosite wait on the
+        # network/subprocess while the two heuristics are pure CPU, so run
+        # them concurrently and pay max(task_times) instead of the sum
+        logger.info("Searching Pfam domains, Prosite motifs and "
+                    "running heuristics in parallel...")
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            pfam_f = pool.submit(search_pfam_domains, sequence, protein_id)
+            prosite_f = pool.submit(_search_prosite_motifs_with_status, sequence)
+            signal_f = pool.submit(predict_signal_peptide, sequence)
+            tm_f = pool.submit(predict_tm_helices, sequence)
+
+            annotations['pfam_domains'] = pfam_f.result()
+            motifs, prosite_status = prosite_f.result()
+            annotations['prosite_motifs'] = motifs
+            annotations['prosite_status'] = prosite_status
+            annotations['prosite_ts'] = time.time()
+            annotations['has_signal_peptide'] = signal_f.result()
+            annotations['tm_helix_count'] = tm_f.result()
+
+        # Save to cache: write-then-rename so a concurrent run never sees
+        # a half-written JSON file
         if use_cache:
             try:
-                import json
-                with open(cache_file, 'w') as f:
-                    json.dump(annotations, f)
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(_dumps(annotations))
+                os.replace(tmp_file, cache_file)
+                with open(index_file, 'w') as f:
+                    f.write(seq_hash)
             except:
                 pass
         
-        print(f"      ✓ Found: {len(annotations['pfam_domains'])} Pfam, "
-              f"{len(annotations['prosite_motifs'])} Prosite, "
-              f"SP={annotations['has_signal_peptide']}, "
-              f"TM={annotations['tm_helix_count']}")
+        logger.info("Found: %d Pfam, %d Prosite, SP=%s, TM=%d",
+                    len(annotations['pfam_domains']),
+                    len(annotations['prosite_motifs']),
+                    annotations['has_signal_peptide'],
+                    annotations['tm_helix_count'])
         
     except Exception as e:
-        print(f"    Error computing functional annotations: {e}")
+        logger.warning("Error computing functional annotations: %s", e)
     
     return annotations
 
 
+def iter_annotations_prefetched(sequences, lookahead=4, use_cache=True):
+    """
+    Iterate functional annotations with the next proteins prefetched.
+
+    While the caller interprets or writes out protein i, annotation of
+    the next `lookahead` proteins is already in flight, so Prosite/Pfam
+    latency overlaps the consumer's work. Results are yielded strictly in
+    input order.
+
+    Args:
+        sequences (iterable): (protein_id, sequence) pairs
+        lookahead (int): How many proteins to keep in flight
+        use_cache (bool): Passed through to compute_functional_annotations
+
+    Yields:
+        tuple: (protein_id, annotations_dict) in input order
+    """
+    sequences = iter(sequences)
+    with ThreadPoolExecutor(max_workers=lookahead) as pool:
+        pending = deque()
+
+        def submit_next():
+            for protein_id, sequence in sequences:
+                pending.append((protein_id, pool.submit(
+                    compute_functional_annotations, sequence, protein_id,
+                    use_cache)))
+                return
+
+        for _ in range(lookahead):
+            submit_next()
+
+        while pending:
+            protein_id, future = pending.popleft()
+            result = future.result()
+            submit_next()
+            yield protein_id, result
+
+
 def check_domain_overlap(human_domains, bact_domains):
     """
     Check if there's overlap between human and bacterial Pfam domains.
     
     Args:
-        human_domains (list): List of human Pfam domain accessions
-        bact_domains (list): List of bacterial Pfam domain accessions
-        
+        human_domains (list): Human Pfam domain accessions. Callers doing
+            all-vs-all comparisons should pass a precomputed frozenset per
+            protein, which is used as-is instead of being rebuilt per pair
+        bact_domains (list): Bacterial Pfam domain accessions (same note)
+
     Returns:
         dict: Overlap information
     """
-    human_set = set(human_domains) if human_domains else set()
-    bact_set = set(bact_domains) if bact_domains else set()
-    
+    human_set = human_domains if isinstance(human_domains, frozenset) \
+        else (set(human_domains) if human_domains else set())
+    bact_set = bact_domains if isinstance(bact_domains, frozenset) \
+        else (set(bact_domains) if bact_domains else set())
+
     shared = human_set & bact_set
     
     return {
@@ -1,7 +1,91 @@
 """Result interpretation and reporting"""
+import io
 
+# Report text templates, formatted once per section instead of one
+# f-string evaluation per line. The odd blank-line placement mirrors the
+# original line-list construction exactly
+_SEP = "=" * 70
 
-def interpret_alignment(human_id, bact_id, alignments, human_chunks, bact_chunks, 
+_HEADER_TEMPLATE = (
+    "📊 ALIGNMENT ANALYSIS REPORT\n"
+    f"{_SEP}\n"
+    "Human Protein:     {human_id}\n"
+    "Bacterial Protein: {bact_id}\n"
+    f"{_SEP}\n"
+    "\n"
+    "❓ WHAT IS A 'SIGNIFICANT REGION'?\n"
+    "\n"
+    "   A significant region is a continuous stretch of protein sequence where\n"
+    "   the human and bacterial proteins show strong structural/functional\n"
+    "   similarity based on ESM-2 embeddings (AI protein language model).\n"
+    "\n"
+    "   How it's determined:\n"
+    "   • Proteins are split into overlapping chunks (10 aa, stride 5)\n"
+    "   • Each chunk gets a 1280-dimensional embedding from ESM-2\n"
+    "   • Smith-Waterman alignment finds regions with similarity > 0.5\n"
+    "   • Only regions with alignment score ≥ 1.0 and ≥ 3 chunks are kept\n"
+    "\n"
+    "   These regions may indicate:\n"
+    "   ✓ Conserved functional domains\n"
+    "   ✓ Similar 3D structure\n"
+    "   ✓ Shared evolutionary origin\n"
+    "   ✓ Potential horizontal gene transfer\n"
+    "\n"
+    f"{_SEP}\n"
+    "🎯 ALIGNMENT SUMMARY\n"
+    "\n"
+    "   Number of significant regions found: {n_regions}"
+)
+
+_REGION_TEMPLATE = (
+    "\n"
+    "\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+    "🔬 REGION {idx}\n"
+    "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+    "   Alignment Score: {score:.2f}\n"
+    "   (Higher = stronger similarity; Score ≥ 15 is very strong)\n"
+    "\n"
+    "   📍 Aligned Positions:\n"
+    "      Human:    {h_start:4d} → {h_end:4d}  ({n_human} chunks ≈ {h_aa} aa)\n"
+    "      Bacteria: {b_start:4d} → {b_end:4d}  ({n_bact} chunks ≈ {b_aa} aa)\n"
+    "\n"
+    "      → These specific parts of the two proteins are similar!"
+)
+
+_METRIC_TEMPLATE = (
+    "\n      {label}:\n"
+    "         Human: {h_mean:7.3f}  │  Bacteria: {b_mean:7.3f}  │  Δ: {diff:+7.3f} {indicator}"
+)
+
+# Compared descriptor metrics: (column, label, delta threshold for the
+# ⬆️/⬇️ indicator)
+_METRICS = [
+    ('GRAVY', 'Hydrophobicity (GRAVY)', 0.5),
+    ('aromaticity', 'Aromaticity', 0.05),
+    ('hydrophobic_fraction', 'Hydrophobic Fraction', 0.1),
+    ('polar_fraction', 'Polar Fraction', 0.1),
+    ('charge_at_pH7', 'Charge at pH 7', 2),
+    ('shannon_entropy', 'Shannon Entropy', 0.2),
+    ('instability_index', 'Instability Index', 10),
+]
+
+_SUMMARY_TEMPLATE = (
+    "\n"
+    f"\n{_SEP}\n"
+    "📈 OVERALL SUMMARY\n"
+    f"{_SEP}\n"
+    "   Total regions found:        {n_regions}\n"
+    "   Total aligned chunk pairs:  {total_aligned_chunks}\n"
+    "   Average alignment score:    {avg_score:.2f}\n"
+    "   Maximum alignment score:    {max_score:.2f}\n"
+    "\n"
+    "   💡 Interpretation Guide:\n"
+    "{guide}\n"
+    f"{_SEP}"
+)
+
+
+def interpret_alignment(human_id, bact_id, alignments, human_chunks, bact_chunks,
                        human_descriptors, bact_descriptors):
     """
     Generate human-readable interpretation of alignment results
@@ -21,158 +105,91 @@ def interpret_alignment(human_id, bact_id, alignments, human_chunks, bact_chunks
     if not alignments:
         return "⚠️ No significant alignments found between the proteins."
     
-    lines = []
-    lines.append(f"📊 ALIGNMENT ANALYSIS REPORT")
-    lines.append("=" * 70)
-    lines.append(f"Human Protein:     {human_id}")
-    lines.append(f"Bacterial Protein: {bact_id}")
-    lines.append("=" * 70)
-    
-    # Explanation section
-    lines.append(f"\n❓ WHAT IS A 'SIGNIFICANT REGION'?\n")
-    lines.append(f"   A significant region is a continuous stretch of protein sequence where")
-    lines.append(f"   the human and bacterial proteins show strong structural/functional")
-    lines.append(f"   similarity based on ESM-2 embeddings (AI protein language model).")
-    lines.append(f"")
-    lines.append(f"   How it's determined:")
-    lines.append(f"   • Proteins are split into overlapping chunks (10 aa, stride 5)")
-    lines.append(f"   • Each chunk gets a 1280-dimensional embedding from ESM-2")
-    lines.append(f"   • Smith-Waterman alignment finds regions with similarity > 0.5")
-    lines.append(f"   • Only regions with alignment score ≥ 1.0 and ≥ 3 chunks are kept")
-    lines.append(f"")
-    lines.append(f"   These regions may indicate:")
-    lines.append(f"   ✓ Conserved functional domains")
-    lines.append(f"   ✓ Similar 3D structure")
-    lines.append(f"   ✓ Shared evolutionary origin")
-    lines.append(f"   ✓ Potential horizontal gene transfer")
-    
-    lines.append(f"\n" + "=" * 70)
-    lines.append(f"🎯 ALIGNMENT SUMMARY\n")
-    lines.append(f"   Number of significant regions found: {len(alignments)}")
-    
+    buf = io.StringIO()
+    buf.write(_HEADER_TEMPLATE.format(human_id=human_id, bact_id=bact_id,
+                                      n_regions=len(alignments)))
+
+    # Position columns as plain arrays once, instead of a Series build and
+    # scalar index per iloc lookup inside the region loop
+    h_start_arr = human_chunks['start'].to_numpy()
+    h_end_arr = human_chunks['end'].to_numpy()
+    b_start_arr = bact_chunks['start'].to_numpy()
+    b_end_arr = bact_chunks['end'].to_numpy()
+
+    # Descriptor stats: one matrix per side built up front, then a fancy-
+    # indexed gather + mean per region instead of seven isin scans of the
+    # full DataFrame. Only metrics present on both sides are compared
+    desc_cols = [col for col, _, _ in _METRICS
+                 if col in human_descriptors.columns
+                 and col in bact_descriptors.columns]
+    metrics = [m for m in _METRICS if m[0] in desc_cols]
+    h_by_chunk = human_descriptors.set_index('chunk_index')
+    b_by_chunk = bact_descriptors.set_index('chunk_index')
+    h_desc_np = h_by_chunk[desc_cols].to_numpy()
+    b_desc_np = b_by_chunk[desc_cols].to_numpy()
+
     for idx, (score, alignment) in enumerate(alignments, 1):
         if not alignment:
             continue
-        
+
         # Get aligned chunk indices
         human_indices = [a[0] for a in alignment]
         bact_indices = [a[1] for a in alignment]
-        
+
         # Get sequence positions
-        h_start = human_chunks.iloc[human_indices[0]]['start']
-        h_end = human_chunks.iloc[human_indices[-1]]['end']
-        b_start = bact_chunks.iloc[bact_indices[0]]['start']
-        b_end = bact_chunks.iloc[bact_indices[-1]]['end']
-        
-        lines.append(f"\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-        lines.append(f"🔬 REGION {idx}")
-        lines.append(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-        lines.append(f"   Alignment Score: {score:.2f}")
-        lines.append(f"   (Higher = stronger similarity; Score ≥ 15 is very strong)")
-        lines.append(f"\n   📍 Aligned Positions:")
-        lines.append(f"      Human:    {h_start:4d} → {h_end:4d}  ({len(human_indices)} chunks ≈ {len(human_indices)*5} aa)")
-        lines.append(f"      Bacteria: {b_start:4d} → {b_end:4d}  ({len(bact_indices)} chunks ≈ {len(bact_indices)*5} aa)")
-        lines.append(f"")
-        lines.append(f"      → These specific parts of the two proteins are similar!")
+        h_start = h_start_arr[human_indices[0]]
+        h_end = h_end_arr[human_indices[-1]]
+        b_start = b_start_arr[bact_indices[0]]
+        b_end = b_end_arr[bact_indices[-1]]
         
-        # Get descriptor statistics for aligned regions
-        h_desc = human_descriptors[human_descriptors['chunk_index'].isin(human_indices)]
-        b_desc = bact_descriptors[bact_descriptors['chunk_index'].isin(bact_indices)]
-        
-        if not h_desc.empty and not b_desc.empty:
-            lines.append(f"\n   🧪 Biochemical Properties Comparison:")
-            lines.append(f"   {'─' * 60}")
-            
-            # Hydrophobicity (GRAVY)
-            if 'GRAVY' in h_desc.columns and 'GRAVY' in b_desc.columns:
-                h_gravy = h_desc['GRAVY'].mean()
-                b_gravy = b_desc['GRAVY'].mean()
-                diff = h_gravy - b_gravy
-                indicator = "⬆️" if diff > 0.5 else "⬇️" if diff < -0.5 else "≈"
-                lines.append(f"      Hydrophobicity (GRAVY):")
-                lines.append(f"         Human: {h_gravy:7.3f}  │  Bacteria: {b_gravy:7.3f}  │  Δ: {diff:+7.3f} {indicator}")
-            
-            # Aromaticity
-            if 'aromaticity' in h_desc.columns and 'aromaticity' in b_desc.columns:
-                h_arom = h_desc['aromaticity'].mean()
-                b_arom = b_desc['aromaticity'].mean()
-                diff = h_arom - b_arom
-                indicator = "⬆️" if diff > 0.05 else "⬇️" if diff < -0.05 else "≈"
-                lines.append(f"      Aromaticity:")
-                lines.append(f"         Human: {h_arom:7.3f}  │  Bacteria: {b_arom:7.3f}  │  Δ: {diff:+7.3f} {indicator}")
-            
-            # Hydrophobic fraction
-            if 'hydrophobic_fraction' in h_desc.columns and 'hydrophobic_fraction' in b_desc.columns:
-                h_hydro = h_desc['hydrophobic_fraction'].mean()
-                b_hydro = b_desc['hydrophobic_fraction'].mean()
-                diff = h_hydro - b_hydro
-                indicator = "⬆️" if diff > 0.1 else "⬇️" if diff < -0.1 else "≈"
-                lines.append(f"      Hydrophobic Fraction:")
-                lines.append(f"         Human: {h_hydro:7.3f}  │  Bacteria: {b_hydro:7.3f}  │  Δ: {diff:+7.3f} {indicator}")
-            
-            # Polar fraction
-            if 'polar_fraction' in h_desc.columns and 'polar_fraction' in b_desc.columns:
-                h_polar = h_desc['polar_fraction'].mean()
-                b_polar = b_desc['polar_fraction'].mean()
-                diff = h_polar - b_polar
-                indicator = "⬆️" if diff > 0.1 else "⬇️" if diff < -0.1 else "≈"
-                lines.append(f"      Polar Fraction:")
-                lines.append(f"         Human: {h_polar:7.3f}  │  Bacteria: {b_polar:7.3f}  │  Δ: {diff:+7.3f} {indicator}")
-            
-            # Charge
-            if 'charge_at_pH7' in h_desc.columns and 'charge_at_pH7' in b_desc.columns:
-                h_charge = h_desc['charge_at_pH7'].mean()
-                b_charge = b_desc['charge_at_pH7'].mean()
-                diff = h_charge - b_charge
-                indicator = "⬆️" if diff > 2 else "⬇️" if diff < -2 else "≈"
-                lines.append(f"      Charge at pH 7:")
-                lines.append(f"         Human: {h_charge:7.3f}  │  Bacteria: {b_charge:7.3f}  │  Δ: {diff:+7.3f} {indicator}")
-            
-            # Shannon entropy
-            if 'shannon_entropy' in h_desc.columns and 'shannon_entropy' in b_desc.columns:
-                h_entropy = h_desc['shannon_entropy'].mean()
-                b_entropy = b_desc['shannon_entropy'].mean()
-                diff = h_entropy - b_entropy
-                indicator = "⬆️" if diff > 0.2 else "⬇️" if diff < -0.2 else "≈"
-                lines.append(f"      Shannon Entropy:")
-                lines.append(f"         Human: {h_entropy:7.3f}  │  Bacteria: {b_entropy:7.3f}  │  Δ: {diff:+7.3f} {indicator}")
-            
-            # Instability
-            if 'instability_index' in h_desc.columns and 'instability_index' in b_desc.columns:
-                h_instab = h_desc['instability_index'].mean()
-                b_instab = b_desc['instability_index'].mean()
-                diff = h_instab - b_instab
-                indicator = "⬆️" if diff > 10 else "⬇️" if diff < -10 else "≈"
-                lines.append(f"      Instability Index:")
-                lines.append(f"         Human: {h_instab:7.3f}  │  Bacteria: {b_instab:7.3f}  │  Δ: {diff:+7.3f} {indicator}")
+        buf.write(_REGION_TEMPLATE.format(
+            idx=idx, score=score,
+            h_start=h_start, h_end=h_end,
+            b_start=b_start, b_end=b_end,
+            n_human=len(human_indices), h_aa=len(human_indices) * 5,
+            n_bact=len(bact_indices), b_aa=len(bact_indices) * 5))
+
+
+        # Gather descriptor statistics for the aligned regions: one row
+        # lookup per side, one mean over the gathered submatrix
+        h_rows = h_by_chunk.index.get_indexer(human_indices)
+        b_rows = b_by_chunk.index.get_indexer(bact_indices)
+        h_rows = h_rows[h_rows >= 0]
+        b_rows = b_rows[b_rows >= 0]
+
+        if len(h_rows) and len(b_rows) and desc_cols:
+            buf.write(f"\n\n   🧪 Biochemical Properties Comparison:\n   {'─' * 60}")
+
+            h_means = h_desc_np[h_rows].mean(axis=0)
+            b_means = b_desc_np[b_rows].mean(axis=0)
+
+            for (col, label, delta), h_mean, b_mean in zip(metrics, h_means, b_means):
+                diff = h_mean - b_mean
+                indicator = "⬆️" if diff > delta else "⬇️" if diff < -delta else "≈"
+                buf.write(_METRIC_TEMPLATE.format(
+                    label=label, h_mean=h_mean, b_mean=b_mean,
+                    diff=diff, indicator=indicator))
     
     # Summary
-    lines.append("\n" + "=" * 70)
-    lines.append("📈 OVERALL SUMMARY")
-    lines.append("=" * 70)
     total_aligned_chunks = sum(len(alignment) for _, alignment in alignments)
     avg_score = sum(score for score, _ in alignments) / len(alignments)
     max_score = max(score for score, _ in alignments)
-    
-    lines.append(f"   Total regions found:        {len(alignments)}")
-    lines.append(f"   Total aligned chunk pairs:  {total_aligned_chunks}")
-    lines.append(f"   Average alignment score:    {avg_score:.2f}")
-    lines.append(f"   Maximum alignment score:    {max_score:.2f}")
-    
+
     # Interpretation hint
-    lines.append("\n   💡 Interpretation Guide:")
     if avg_score > 15:
-        lines.append("      ✅ Strong similarity detected - High confidence alignment")
+        guide = "      ✅ Strong similarity detected - High confidence alignment"
     elif avg_score > 10:
-        lines.append("      ✓  Moderate similarity - Potential functional relationship")
+        guide = "      ✓  Moderate similarity - Potential functional relationship"
     elif avg_score > 5:
-        lines.append("      ⚠️  Weak similarity - Consider with caution")
+        guide = "      ⚠️  Weak similarity - Consider with caution"
     else:
-        lines.append("      ❌ Very weak similarity - Likely not functionally related")
-    
-    lines.append("=" * 70)
-    
-    return "\n".join(lines)
+        guide = "      ❌ Very weak similarity - Likely not functionally related"
+
+    buf.write(_SUMMARY_TEMPLATE.format(
+        n_regions=len(alignments), total_aligned_chunks=total_aligned_chunks,
+        avg_score=avg_score, max_score=max_score, guide=guide))
+
+    return buf.getvalue()
 
 
 def generate_summary_stats(human_chunks, bact_chunks, alignments, 
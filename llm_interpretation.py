@@ -1,23 +1,104 @@
 """LLM-based interpretation using Groq API"""
+import asyncio
+import functools
+import hashlib
+import io
 import json
 import os
+import shelve
+import threading
+
+import numpy as np
+
+from config import CACHE_DIR
+
+try:
+    from groq import Groq, AsyncGroq
+except ImportError:
+    # groq is optional; callers get a clear install hint instead of a crash
+    Groq = AsyncGroq = None
+
+# Groq generation settings, shared by the sync and async callers and
+# part of the response cache key
+_GROQ_MODEL = "llama-3.3-70b-versatile"
+_GROQ_TEMPERATURE = 0.7
+
+# Response cache keyed by (model, temperature, prompt) hash: a repeated
+# analysis of the same protein pair costs a dict lookup instead of a
+# multi-second API call. The shelve file persists across processes
+_LLM_CACHE = {}
+_LLM_CACHE_LOCK = threading.Lock()
+_LLM_CACHE_FILE = os.path.join(CACHE_DIR, 'llm_cache')
+
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key):
+    """One sync client per key: reuses the underlying HTTP connection
+    pool across calls instead of paying a TLS handshake each time"""
+    return Groq(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_async_client(api_key):
+    """Async twin of _get_client, shared by the batched dispatcher"""
+    return AsyncGroq(api_key=api_key)
+
+
+def _llm_cache_key(prompt):
+    """Cache key covering everything that determines the response"""
+    return hashlib.sha256(
+        f"{_GROQ_MODEL}|{_GROQ_TEMPERATURE}|{prompt}".encode()).hexdigest()
+
+
+def bust_cache():
+    """Drop all cached LLM responses, in memory and on disk"""
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE.clear()
+        try:
+            with shelve.open(_LLM_CACHE_FILE) as db:
+                db.clear()
+        except Exception:
+            pass
+
+
+def descriptors_to_dict(descriptors_df):
+    """
+    Convert a descriptor DataFrame to a dict of chunk_index-positioned arrays
+
+    Looking up a region's descriptors becomes a numpy fancy index over
+    len(indices) rows instead of a scan of the whole frame. Callers
+    comparing one protein against many should convert once and pass the
+    dict to prepare_analysis_data directly.
+
+    Args:
+        descriptors_df (pd.DataFrame): Descriptors with a chunk_index column
+
+    Returns:
+        dict: Mapping of descriptor name -> ndarray indexed by chunk_index
+    """
+    indexed = descriptors_df.set_index('chunk_index')
+    if len(indexed):
+        # Position == chunk_index even if rows are unsorted or sparse
+        indexed = indexed.reindex(range(int(indexed.index.max()) + 1))
+    return {prop: indexed[prop].to_numpy() for prop in indexed.columns}
 
 
 def prepare_analysis_data(human_id, bact_id, alignments, human_chunks, bact_chunks,
                          human_descriptors, bact_descriptors, similarity_matrix):
     """
     Prepare comprehensive data for LLM analysis
-    
+
     Args:
         human_id (str): Human protein ID
         bact_id (str): Bacterial protein ID
         alignments (list): List of (score, alignment) tuples
         human_chunks (pd.DataFrame): Human chunks
         bact_chunks (pd.DataFrame): Bacterial chunks
-        human_descriptors (pd.DataFrame): Human descriptors
-        bact_descriptors (pd.DataFrame): Bacterial descriptors
+        human_descriptors (pd.DataFrame or dict): Human descriptors, as a
+            DataFrame or a descriptors_to_dict result
+        bact_descriptors (pd.DataFrame or dict): Bacterial descriptors (same)
         similarity_matrix (np.ndarray): Similarity matrix
-        
+
     Returns:
         dict: Prepared data for LLM
     """
@@ -37,10 +118,6 @@ def prepare_analysis_data(human_id, bact_id, alignments, human_chunks, bact_chun
     b_start = bact_chunks.iloc[bact_indices[0]]['start']
     b_end = bact_chunks.iloc[bact_indices[-1]]['end']
     
-    # Get descriptors for aligned regions
-    h_desc = human_descriptors[human_descriptors['chunk_index'].isin(human_indices)]
-    b_desc = bact_descriptors[bact_descriptors['chunk_index'].isin(bact_indices)]
-    
     # Prepare data
     data = {
         'proteins': {
@@ -60,24 +137,42 @@ def prepare_analysis_data(human_id, bact_id, alignments, human_chunks, bact_chun
         'alignment': {
             'score': float(score),
             'length': len(alignment),
-            'avg_similarity': float(similarity_matrix[human_indices, :][:, bact_indices].mean())
+            # np.ix_ gathers the submatrix in one pass; the fp32 cast is
+            # local to the gathered region, so an fp16 memmap-backed
+            # matrix pages in only the touched rows
+            'avg_similarity': float(similarity_matrix[np.ix_(human_indices, bact_indices)]
+                                    .astype(np.float32).mean())
         },
         'biochemical_comparison': {}
     }
     
-    # Add biochemical properties
-    if not h_desc.empty and not b_desc.empty:
-        properties = ['gravy', 'aromaticity', 'helix_fraction', 'sheet_fraction', 
-                     'charge_at_pH7', 'instability_index']
-        
-        for prop in properties:
-            if prop in h_desc.columns and prop in b_desc.columns:
-                data['biochemical_comparison'][prop] = {
-                    'human': float(h_desc[prop].mean()),
-                    'bacteria': float(b_desc[prop].mean()),
-                    'difference': float(h_desc[prop].mean() - b_desc[prop].mean())
-                }
-    
+    # Add biochemical properties: descriptor arrays positioned by
+    # chunk_index make the region lookup a fancy index over the aligned
+    # chunks, not a scan of the whole descriptor table
+    if not isinstance(human_descriptors, dict):
+        human_descriptors = descriptors_to_dict(human_descriptors)
+    if not isinstance(bact_descriptors, dict):
+        bact_descriptors = descriptors_to_dict(bact_descriptors)
+
+    properties = ['gravy', 'aromaticity', 'helix_fraction', 'sheet_fraction',
+                  'charge_at_pH7', 'instability_index']
+    props = [p for p in properties
+             if p in human_descriptors and p in bact_descriptors]
+
+    if props and len(human_descriptors[props[0]]) and len(bact_descriptors[props[0]]):
+        hi = np.asarray(human_indices)
+        bi = np.asarray(bact_indices)
+        comparison = {}
+        for prop in props:
+            h_mean = float(human_descriptors[prop][hi].mean())
+            b_mean = float(bact_descriptors[prop][bi].mean())
+            comparison[prop] = {
+                'human': h_mean,
+                'bacteria': b_mean,
+                'difference': h_mean - b_mean
+            }
+        data['biochemical_comparison'] = comparison
+
     return data
 
 
@@ -91,7 +186,8 @@ def generate_llm_prompt(data):
     Returns:
         str: Formatted prompt
     """
-    prompt = f"""You are an expert protein bioinformatician. Analyze this protein alignment systematically.
+    buf = io.StringIO()
+    buf.write(f"""You are an expert protein bioinformatician. Analyze this protein alignment systematically.
 
 **PROTEINS ANALYZED:**
 - Human: {data['proteins']['human']['id']} (Length: ~{data['proteins']['human']['total_length']} aa)
@@ -105,15 +201,17 @@ def generate_llm_prompt(data):
 - Average similarity: {data['alignment']['avg_similarity']:.3f}
 
 **BIOCHEMICAL PROPERTIES COMPARISON:**
-"""
-    
+""")
+
+    # Buffer writes instead of prompt += so the growing string is never
+    # recopied per property
     for prop, values in data['biochemical_comparison'].items():
-        prompt += f"\n{prop.replace('_', ' ').title()}:"
-        prompt += f"\n  Human: {values['human']:.3f}"
-        prompt += f"\n  Bacteria: {values['bacteria']:.3f}"
-        prompt += f"\n  Difference: {values['difference']:.3f}"
-    
-    prompt += """
+        buf.write(f"\n{prop.replace('_', ' ').title()}:"
+                  f"\n  Human: {values['human']:.3f}"
+                  f"\n  Bacteria: {values['bacteria']:.3f}"
+                  f"\n  Difference: {values['difference']:.3f}")
+
+    buf.write("""
 
 **ANALYSIS TASKS:**
 1. Evaluate the biological significance of this alignment
@@ -127,15 +225,46 @@ def generate_llm_prompt(data):
 5. Provide specific insights about the aligned regions
 
 Please provide a clear, scientific interpretation in 3-4 paragraphs.
+""")
+
+    return buf.getvalue()
+
+
+# Invariant prompt prefix, identical for every pair — kept as one module
+# constant so it is formatted exactly never and providers can prefix-cache it
+_PROMPT_HEADER = """You are an expert protein bioinformatician. Analyze this ESM2 embedding alignment systematically.
+
+ANALYSIS FRAMEWORK - Weigh ALL evidence fairly:
+1. Domain analysis is IMPORTANT but not the only factor
+2. Alignment coverage and continuity are SIGNIFICANT signals
+3. Biochemical similarity provides FUNCTIONAL context
+4. Consider ALL evidence before concluding
+
+=== PROTEIN PAIR ===
 """
-    
-    return prompt
+
+
+@functools.lru_cache(maxsize=1024)
+def _protein_section(label, protein_id, total_length, domains, motifs,
+                     has_signal_peptide, tm_helix_count):
+    """One protein's block of the pair prompt, memoized per protein.
+
+    Batch runs that hold one protein fixed against many partners reuse
+    this section verbatim instead of re-formatting it per pair."""
+    return (
+        f"{label}: {protein_id}\n"
+        f"  - Length: ~{total_length} aa\n"
+        f"  - Pfam domains: {', '.join(domains) if domains else 'None detected'}\n"
+        f"  - Prosite motifs: {', '.join(motifs) if motifs else 'None'}\n"
+        f"  - Signal peptide: {'Yes' if has_signal_peptide else 'No'}\n"
+        f"  - TM helices: {tm_helix_count}\n"
+    )
 
 
 def generate_llm_prompt_full(data):
     """
     Generate comprehensive prompt matching notebook structure exactly
-    
+
     Args:
         data (dict): Prepared analysis data with functional annotations
         
@@ -152,34 +281,28 @@ def generate_llm_prompt_full(data):
     domain_overlap = data.get('domain_overlap', {})
     
     # Format Pfam domains
-    human_domains = human_func.get('pfam_domains', [])
-    bact_domains = bact_func.get('pfam_domains', [])
     shared_domains = domain_overlap.get('shared_domains', [])
-    
-    # Build prompt matching notebook structure
-    prompt = f"""You are an expert protein bioinformatician. Analyze this ESM2 embedding alignment systematically.
-
-ANALYSIS FRAMEWORK - Weigh ALL evidence fairly:
-1. Domain analysis is IMPORTANT but not the only factor
-2. Alignment coverage and continuity are SIGNIFICANT signals
-3. Biochemical similarity provides FUNCTIONAL context
-4. Consider ALL evidence before concluding
-
-=== PROTEIN PAIR ===
-Human: {human_info['id']}
-  - Length: ~{human_info.get('total_length', 'N/A')} aa
-  - Pfam domains: {', '.join(human_domains) if human_domains else 'None detected'}
-  - Prosite motifs: {', '.join(human_func.get('prosite_motifs', [])) if human_func.get('prosite_motifs') else 'None'}
-  - Signal peptide: {'Yes' if human_func.get('has_signal_peptide') else 'No'}
-  - TM helices: {human_func.get('tm_helix_count', 0)}
-
-Bacteria: {bact_info['id']}
-  - Length: ~{bact_info.get('total_length', 'N/A')} aa
-  - Pfam domains: {', '.join(bact_domains) if bact_domains else 'None detected'}
-  - Prosite motifs: {', '.join(bact_func.get('prosite_motifs', [])) if bact_func.get('prosite_motifs') else 'None'}
-  - Signal peptide: {'Yes' if bact_func.get('has_signal_peptide') else 'No'}
-  - TM helices: {bact_func.get('tm_helix_count', 0)}
 
+    # Build prompt matching notebook structure. The static header and the
+    # per-protein sections are reused verbatim across pairs, so batch runs
+    # sharing a protein re-format only the pair-specific blocks (and the
+    # stable prefix is what provider-side prompt caching keys on)
+    buf = io.StringIO()
+    buf.write(_PROMPT_HEADER)
+    buf.write(_protein_section(
+        'Human', human_info['id'], human_info.get('total_length', 'N/A'),
+        tuple(human_func.get('pfam_domains', [])),
+        tuple(human_func.get('prosite_motifs', [])),
+        bool(human_func.get('has_signal_peptide')),
+        human_func.get('tm_helix_count', 0)))
+    buf.write("\n")
+    buf.write(_protein_section(
+        'Bacteria', bact_info['id'], bact_info.get('total_length', 'N/A'),
+        tuple(bact_func.get('pfam_domains', [])),
+        tuple(bact_func.get('prosite_motifs', [])),
+        bool(bact_func.get('has_signal_peptide')),
+        bact_func.get('tm_helix_count', 0)))
+    buf.write(f"""
 === DOMAIN OVERLAP ===
 Shared Pfam domains: {', '.join(shared_domains) if shared_domains else 'NONE'}
 Domain overlap detected: {'YES - SIGNIFICANT' if shared_domains else 'NO'}
@@ -192,17 +315,18 @@ Domain overlap detected: {'YES - SIGNIFICANT' if shared_domains else 'NO'}
 - Average similarity: {alignment_info.get('avg_similarity', 0):.3f}
 
 === BIOCHEMICAL DESCRIPTORS COMPARISON ===
-"""
-    
-    # Add biochemical comparisons
+""")
+
+    # Add biochemical comparisons, one buffer write per property instead
+    # of re-copying the growing prompt string four times each
     for prop, values in biochem.items():
         prop_name = prop.replace('_', ' ').title()
-        prompt += f"\n{prop_name}:"
-        prompt += f"\n  Human: {values['human']:.4f}"
-        prompt += f"\n  Bacteria: {values['bacteria']:.4f}"
-        prompt += f"\n  Difference: {values['difference']:.4f}"
-    
-    prompt += """
+        buf.write(f"\n{prop_name}:"
+                  f"\n  Human: {values['human']:.4f}"
+                  f"\n  Bacteria: {values['bacteria']:.4f}"
+                  f"\n  Difference: {values['difference']:.4f}")
+
+    buf.write("""
 
 === ANALYSIS REQUIRED ===
 
@@ -229,56 +353,200 @@ Based on ALL the evidence above, provide:
    - What additional evidence would strengthen the conclusion?
 
 Provide a balanced, evidence-based analysis. Do not over-interpret weak signals.
-"""
-    
-    return prompt
+""")
+
+    return buf.getvalue()
 
 
-def call_groq_api(prompt, api_key):
+async def call_groq_api_async(prompt, client):
+    """
+    Call Groq API for LLM interpretation on an async client
+
+    The raw-response variant hands back the HTTP body untouched, so the
+    content is one json.loads and two dict lookups away — no pydantic
+    model is validated per response, which matters when the batched
+    dispatcher has hundreds of completions coming back.
+
+    Args:
+        prompt (str): The prompt to send
+        client (groq.AsyncGroq): Shared async Groq client
+
+    Returns:
+        str: LLM response
+    """
+    raw = await client.chat.completions.with_raw_response.create(
+        model=_GROQ_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an expert protein bioinformatician specializing in sequence analysis and evolutionary biology."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        temperature=_GROQ_TEMPERATURE,
+        max_tokens=2000,
+        top_p=0.9
+    )
+
+    try:
+        return json.loads(raw.content)['choices'][0]['message']['content']
+    except (json.JSONDecodeError, KeyError, IndexError):
+        # Unexpected body shape: fall back to the SDK's validated parse
+        return raw.parse().choices[0].message.content
+
+
+async def _gather_groq_calls(prompts, api_key, concurrency):
+    """Dispatch all prompts on one client, at most `concurrency` in flight"""
+    client = _get_async_client(api_key)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call(prompt):
+        async with semaphore:
+            try:
+                return await call_groq_api_async(prompt, client)
+            except Exception as e:
+                return f"Error calling Groq API: {str(e)}"
+
+    return await asyncio.gather(*[one_call(prompt) for prompt in prompts])
+
+
+def _groq_stream_fragments(prompt, api_key):
+    """
+    Yield the raw response fragments for one streamed completion
+
+    Failures propagate as exceptions, so callers can tell a dropped
+    stream from generated text; the public wrappers decide whether to
+    render that as an error message or refuse to cache.
+
+    Args:
+        prompt (str): The prompt to send
+        api_key (str): Groq API key
+
+    Yields:
+        str: Response text fragments, in order
+    """
+    stream = _get_client(api_key).chat.completions.create(
+        model=_GROQ_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an expert protein bioinformatician specializing in sequence analysis and evolutionary biology."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        temperature=_GROQ_TEMPERATURE,
+        max_tokens=2000,
+        top_p=0.9,
+        stream=True
+    )
+
+    for event in stream:
+        delta = event.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+def call_groq_api_stream(prompt, api_key):
+    """
+    Call Groq API and yield the response as it is generated
+
+    Streaming drops time-to-first-token from the full generation latency
+    to a few hundred ms, so a caller can render or post-process output
+    while the rest of the completion is still being produced. A stream
+    that fails mid-generation yields the error text as its final
+    fragment instead of raising.
+
+    Args:
+        prompt (str): The prompt to send
+        api_key (str): Groq API key
+
+    Yields:
+        str: Response text fragments, in order
+    """
+    if Groq is None:
+        yield "Error: Groq library not installed. Run: pip install groq"
+        return
+
+    try:
+        yield from _groq_stream_fragments(prompt, api_key)
+    except Exception as e:
+        yield f"Error calling Groq API: {str(e)}"
+
+
+def call_groq_api(prompt, api_key, no_cache=False):
     """
     Call Groq API for LLM interpretation
-    
+
     Args:
         prompt (str): The prompt to send
         api_key (str): Groq API key
-        
+        no_cache (bool): Skip the response cache and re-query
+
     Returns:
         str: LLM response
     """
-    try:
-        from groq import Groq
-        
-        client = Groq(api_key=api_key)
-        
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert protein bioinformatician specializing in sequence analysis and evolutionary biology."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-            top_p=0.9
-        )
-        
-        return response.choices[0].message.content
-        
-    except ImportError:
+    key = _llm_cache_key(prompt)
+
+    if not no_cache:
+        with _LLM_CACHE_LOCK:
+            if key in _LLM_CACHE:
+                return _LLM_CACHE[key]
+            try:
+                with shelve.open(_LLM_CACHE_FILE) as db:
+                    if key in db:
+                        response = db[key]
+                        _LLM_CACHE[key] = response
+                        return response
+            except Exception:
+                pass
+
+    if Groq is None:
         return "Error: Groq library not installed. Run: pip install groq"
+
+    # Consume the raising variant directly: a stream that dies
+    # mid-generation surfaces as an exception here, not as error text
+    # appended to partial output, so a truncated response can never be
+    # mistaken for a complete one and cached
+    try:
+        response = ''.join(_groq_stream_fragments(prompt, api_key))
     except Exception as e:
+        # Failures are transient; report them but never cache them
         return f"Error calling Groq API: {str(e)}"
 
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE[key] = response
+        try:
+            with shelve.open(_LLM_CACHE_FILE) as db:
+                db[key] = response
+        except Exception:
+            pass
+
+    return response
+
+
+# Shown whenever no Groq API key is configured
+_NO_API_KEY_MESSAGE = """
+LLM Interpretation Not Available
+
+To enable AI-powered interpretation:
+1. Get a free API key from: https://console.groq.com/keys
+2. Set it in config.py or as environment variable GROQ_API_KEY
+3. Install groq: pip install groq
+
+The basic interpretation above provides the key findings.
+"""
+
 
 def get_llm_interpretation(human_id, bact_id, alignments, human_chunks, bact_chunks,
                           human_descriptors, bact_descriptors, similarity_matrix, 
                           human_functional=None, bact_functional=None, domain_overlap=None,
-                          api_key=None):
+                          api_key=None, stream=False):
     """
     Get LLM-powered interpretation of alignment results
     
@@ -295,26 +563,20 @@ def get_llm_interpretation(human_id, bact_id, alignments, human_chunks, bact_chu
         bact_functional (dict): Bacterial functional annotations
         domain_overlap (dict): Domain overlap information
         api_key (str): Groq API key (optional, can be set in environment)
-        
+        stream (bool): Return a generator of response fragments instead
+            of waiting for the full completion
+
     Returns:
-        str: LLM interpretation or error message
+        str: LLM interpretation or error message (a fragment generator
+        when stream=True)
     """
     # Check for API key
     if api_key is None:
         api_key = os.environ.get('GROQ_API_KEY')
     
     if not api_key:
-        return """
-LLM Interpretation Not Available
+        return _NO_API_KEY_MESSAGE
 
-To enable AI-powered interpretation:
-1. Get a free API key from: https://console.groq.com/keys
-2. Set it in config.py or as environment variable GROQ_API_KEY
-3. Install groq: pip install groq
-
-The basic interpretation above provides the key findings.
-"""
-    
     # Prepare data
     data = prepare_analysis_data(
         human_id, bact_id, alignments, 
@@ -336,6 +598,72 @@ The basic interpretation above provides the key findings.
     
     # Call LLM
     print("Calling Groq API for LLM interpretation...")
+    if stream:
+        return call_groq_api_stream(prompt, api_key)
     interpretation = call_groq_api(prompt, api_key)
-    
+
     return interpretation
+
+
+def get_llm_interpretation_many(pairs, api_key=None, concurrency=16):
+    """
+    Get LLM interpretations for many protein pairs concurrently
+
+    Each API call blocks on network I/O for seconds, so N sequential
+    calls pay N round trips. This dispatches every prompt on one
+    AsyncGroq client with asyncio.gather, so N pairs cost roughly one
+    round trip; a semaphore caps in-flight requests to respect Groq
+    rate limits.
+
+    Args:
+        pairs (list): Dicts of keyword arguments for get_llm_interpretation
+            (human_id, bact_id, alignments, ... — everything but api_key)
+        api_key (str): Groq API key (optional, can be set in environment)
+        concurrency (int): Maximum concurrent API calls
+
+    Returns:
+        list: One interpretation (or error message) per pair, in input order
+    """
+    pairs = list(pairs)
+    if api_key is None:
+        api_key = os.environ.get('GROQ_API_KEY')
+
+    if not api_key:
+        return [_NO_API_KEY_MESSAGE] * len(pairs)
+
+    # Build prompts up front; pairs without alignment data keep their
+    # placeholder message and never hit the API
+    results = [None] * len(pairs)
+    prompts = []
+    prompt_slots = []
+    for i, pair in enumerate(pairs):
+        data = prepare_analysis_data(
+            pair['human_id'], pair['bact_id'], pair['alignments'],
+            pair['human_chunks'], pair['bact_chunks'],
+            pair['human_descriptors'], pair['bact_descriptors'],
+            pair['similarity_matrix']
+        )
+
+        if data is None:
+            results[i] = "No alignment data available for LLM interpretation."
+            continue
+
+        data['human_functional'] = pair.get('human_functional') or {}
+        data['bact_functional'] = pair.get('bact_functional') or {}
+        data['domain_overlap'] = pair.get('domain_overlap') or {}
+
+        prompts.append(generate_llm_prompt_full(data))
+        prompt_slots.append(i)
+
+    if prompts:
+        print(f"Calling Groq API for {len(prompts)} LLM interpretations...")
+        if AsyncGroq is None:
+            responses = ["Error: Groq library not installed. "
+                         "Run: pip install groq"] * len(prompts)
+        else:
+            responses = asyncio.run(
+                _gather_groq_calls(prompts, api_key, concurrency))
+        for i, response in zip(prompt_slots, responses):
+            results[i] = response
+
+    return results
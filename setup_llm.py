@@ -1,4 +1,6 @@
 """Quick setup for LLM interpretation (writes .env)"""
+import os
+import re
 
 print("="*70)
 print("LLM Interpretation Setup")
@@ -23,23 +25,23 @@ if api_key:
     # Write to .env file (ignored by git). config.py reads from env.
     try:
         env_path = '.env'
-        lines = []
-        # Preserve existing .env content if exists, replacing GROQ_API_KEY
-        if os.path.exists(env_path):
+        if not os.path.exists(env_path):
+            with open(env_path, 'w', encoding='utf-8') as f:
+                f.write(f'GROQ_API_KEY={api_key}\n')
+        else:
+            # Preserve existing .env content, replacing GROQ_API_KEY in a
+            # single substitution pass: one read, one write, no line loop
             with open(env_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        key_written = False
-        new_lines = []
-        for line in lines:
-            if line.strip().startswith('GROQ_API_KEY='):
-                new_lines.append(f'GROQ_API_KEY={api_key}\n')
-                key_written = True
-            else:
-                new_lines.append(line)
-        if not key_written:
-            new_lines.append(f'GROQ_API_KEY={api_key}\n')
-        with open(env_path, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
+                content = f.read()
+            new_content, count = re.subn(
+                r'(?m)^\s*GROQ_API_KEY=.*$', f'GROQ_API_KEY={api_key}',
+                content, count=1)
+            if count == 0:
+                if new_content and not new_content.endswith('\n'):
+                    new_content += '\n'
+                new_content += f'GROQ_API_KEY={api_key}\n'
+            with open(env_path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
         print("\n✓ API key saved to .env (git-ignored)")
         print("✓ LLM interpretation is now enabled!")
         print()
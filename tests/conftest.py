@@ -0,0 +1,431 @@
+"""Shared fixtures for the test suite"""
+import atexit
+import functools
+import hashlib
+import json
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+try:
+    # re2 compiles to a non-backtracking DFA; same API for the calls used
+    import re2 as re
+except ImportError:
+    import re
+
+try:
+    import pyhmmer
+except ImportError:
+    # pyhmmer is optional; Pfam scan fixtures skip without it
+    pyhmmer = None
+
+# Pressed Pfam database (hmmpress writes the .h3* files next to the .hmm)
+PFAM_HMM_PATH = os.path.expanduser("~/pfam/Pfam-A.hmm")
+
+# Number of profiles in Pfam-A 35; fixing Z/domZ to the database size
+# makes hmmsearch E-values match what hmmscan would have reported
+PFAM_Z = 19632
+
+# HMMER guidance: a single search stops scaling past two worker threads
+# because of the parser bottleneck, and more just oversubscribe cores
+_HMMER_CPUS = min(2, os.cpu_count())
+
+# Every sequence the suite scans against Pfam, keyed by query name. All
+# of them ride one hmmsearch pass, so the database-load cost is paid
+# once per session no matter how many tests ask for domains
+PFAM_TEST_SEQUENCES = {
+    "test": "MKTFIFLALLGAAVAFPVDDDDKIVGGYTCGANTVPYQVSLNSGYHFCGGSLINSQWVVSAAHCYKSGIQVRLGEDNINVVEGNEQFISASKSIVHPSYNSNTLNNDIMLIKLKSAASLNSRVASISLPTSCASAGTQCLISGWGNTKSSGTSYPDVLKCLKAPILSDSSCKSAYPGQITSNMFCAGYLEGGKDSCQGDSGGPVVCSGKLQGIVSWGSGCAQKNKPGVYTKVCNYVSWIKQTIASN",
+}
+
+# Digitize the registered sequences once at import: the per-character
+# alphabet-table lookup is paid a single time, and every search reuses
+# the same digital sequences
+if pyhmmer is not None:
+    _ALPHABET = pyhmmer.easel.Alphabet.amino()
+    _DIGITAL_TEST_SEQUENCES = {
+        name: pyhmmer.easel.TextSequence(
+            name=name.encode(), sequence=seq).digitize(_ALPHABET)
+        for name, seq in PFAM_TEST_SEQUENCES.items()}
+else:
+    _ALPHABET = None
+    _DIGITAL_TEST_SEQUENCES = None
+
+
+def _prewarm_file(path):
+    """
+    Hint the kernel to page a file in before it is parsed
+
+    POSIX_FADV_WILLNEED starts readahead on the whole file, so the HMM
+    parse below streams from page cache instead of stalling on disk.
+    No-op where posix_fadvise is unavailable (Windows).
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=1)
+def _load_pfam_profiles():
+    """
+    Load the pressed Pfam database once per process
+
+    Reading Pfam-A.hmm.h3m through HMMFile yields profiles already in
+    HMMER's optimized binary layout, and the materialized block is shared
+    by every scan in the session — the multi-hundred-MB parse happens
+    exactly once instead of per hmmsearch invocation.
+    """
+    if pyhmmer is None:
+        return None
+    h3m_path = PFAM_HMM_PATH + ".h3m"
+    if not os.path.exists(h3m_path):
+        return None
+    _prewarm_file(h3m_path)
+    with pyhmmer.plan7.HMMFile(h3m_path) as hmm_file:
+        return pyhmmer.plan7.OptimizedProfileBlock(
+            pyhmmer.easel.Alphabet.amino(), hmm_file.optimized_profiles())
+
+
+# Pfam assignments are deterministic per sequence, so results are cached
+# by sequence hash and survive across runs
+PFAM_RESULTS_DIR = os.path.join("cache", "pfam_results")
+
+
+def _pfam_cache_path(sequence):
+    """Cache file path for one sequence's domain hits"""
+    key = hashlib.sha256(sequence.encode()).hexdigest()
+    return os.path.join(PFAM_RESULTS_DIR, f"{key}.json")
+
+
+def _mmseqs_pfam_search(misses):
+    """
+    MMseqs2 fast path for the miss scan, enabled with USE_MMSEQS=1
+
+    MMseqs2's k-mer prefilter and vectorized alignment use every core,
+    finishing the smoke-test scan in a fraction of hmmsearch's time
+    against a Pfam profile database pre-built at ~/pfam/pfamDB. The m8
+    output is converted back to per-sequence profile-name lists, so
+    callers cannot tell which engine produced the hits. Returns None
+    when mmseqs or the database is unavailable.
+    """
+    temp_dir = os.path.join("cache", "pfam_temp")
+    os.makedirs(temp_dir, exist_ok=True)
+    fasta = os.path.join(temp_dir, "batch.fasta")
+    _write_fasta_records(
+        fasta, [f"{name}\n{seq}\n" for name, seq in misses.items()])
+    m8 = os.path.join(temp_dir, "batch.m8")
+
+    cmd = (f"mmseqs easy-search {win_to_wsl(fasta)} ~/pfam/pfamDB "
+           f"{win_to_wsl(m8)} /tmp/mmseqs_tmp --threads {os.cpu_count()}")
+    try:
+        rc, _ = _wsl.run(cmd)
+    except Exception:
+        return None
+    if rc != 0 or not os.path.exists(m8):
+        return None
+
+    hits = {name: [] for name in misses}
+    with open(m8) as f:
+        for line in f:
+            query, target = line.split('\t', 2)[:2]
+            if query in hits and target not in hits[query]:
+                hits[query].append(target)
+    return hits
+
+
+def _batched_pfam_search():
+    """
+    One search pass over every registered test sequence
+
+    Sequences with hash-keyed cached results skip the search entirely;
+    a fully cached session never even loads the database. The remaining
+    misses ride one invocation — MMseqs2 when USE_MMSEQS=1 and the
+    profile database exists, in-process hmmsearch otherwise — so N
+    queries cost one database load, not N. Returns a dict mapping each
+    query name to the list of Pfam profile names that include it, or
+    None when the misses cannot be scanned by either engine.
+    """
+    results = {}
+    misses = {}
+    for name, seq in PFAM_TEST_SEQUENCES.items():
+        cache_path = _pfam_cache_path(seq)
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                results[name] = json.load(f)
+        else:
+            misses[name] = seq
+
+    if not misses:
+        return results
+
+    hits = None
+    if os.environ.get('USE_MMSEQS') == '1':
+        hits = _mmseqs_pfam_search(misses)
+
+    if hits is None:
+        profiles = _load_pfam_profiles()
+        if profiles is None:
+            return None
+
+        targets = pyhmmer.easel.DigitalSequenceBlock(
+            _ALPHABET, [_DIGITAL_TEST_SEQUENCES[name] for name in misses])
+
+        hits = {name: [] for name in misses}
+        for top_hits in pyhmmer.hmmer.hmmsearch(
+                profiles, targets, cpus=_HMMER_CPUS, Z=PFAM_Z, domZ=PFAM_Z):
+            profile_name = top_hits.query.name.decode()
+            for hit in top_hits:
+                if hit.included:
+                    hits[hit.name.decode()].append(profile_name)
+
+    results.update(hits)
+
+    os.makedirs(PFAM_RESULTS_DIR, exist_ok=True)
+    for name, seq in misses.items():
+        with open(_pfam_cache_path(seq), 'w') as f:
+            json.dump(results[name], f)
+
+    return results
+
+
+class _WSLShell:
+    """
+    One long-lived WSL bash session shared by every test command
+
+    Spawning `wsl` per command re-initializes the WSL2 VM session each
+    time, and that startup dominates short commands. A single Popen'd
+    bash with piped stdin/stdout amortizes the cold start over the whole
+    test run; a sentinel echo carries each command's exit code back.
+    """
+    _SENTINEL = "__END__"
+
+    def __init__(self):
+        self._proc = None
+
+    def _ensure(self):
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ['wsl', 'bash'], stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        return self._proc
+
+    def run(self, cmd):
+        """Run one command in the shared shell, returning (rc, output)"""
+        proc = self._ensure()
+        proc.stdin.write(f"{cmd}; echo {self._SENTINEL}$?\n")
+        proc.stdin.flush()
+        lines = []
+        for line in proc.stdout:
+            if line.startswith(self._SENTINEL):
+                return int(line[len(self._SENTINEL):]), ''.join(lines)
+            lines.append(line)
+        # Shell died mid-command; the next run() respawns it
+        return 1, ''.join(lines)
+
+    def close(self):
+        if self._proc is not None and self._proc.poll() is None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except Exception:
+                self._proc.kill()
+
+
+_wsl = _WSLShell()
+atexit.register(_wsl.close)
+
+
+@functools.lru_cache(maxsize=1)
+def wsl_available():
+    """
+    Whether WSL answers at all, probed once per session
+
+    The first `wsl` after boot spins up the WSL2 VM, which costs
+    hundreds of ms; memoizing the probe means every caller after the
+    first gets the answer for free and no other test pays its own cold
+    start just to find out there is nothing to talk to.
+    """
+    try:
+        rc, _ = _wsl.run('true')
+        return rc == 0
+    except Exception:
+        return False
+
+
+def win_to_wsl(path):
+    """
+    Translate a Windows absolute path to its WSL /mnt mount path
+
+    Pure string transform: every `wsl wslpath` round trip boots the VM
+    and crosses the filesystem boundary just to produce a string we can
+    compute locally. Paths without a drive letter pass through with
+    separators normalized.
+    """
+    path = os.path.abspath(path)
+    if len(path) > 1 and path[1] == ':':
+        return '/mnt/' + path[0].lower() + path[2:].replace('\\', '/')
+    return path.replace('\\', '/')
+
+
+# POSIX caps writev at 1024 iovecs per call
+_IOV_MAX = 1024
+
+
+def _write_fasta_records(path, records):
+    """
+    Write FASTA record blocks with one vectored syscall per 1024 records
+
+    os.writev hands the kernel the whole record list at once, so a big
+    multi-FASTA costs one syscall per IOV_MAX records instead of one
+    write() each. Windows has no writev; there the buffers are joined
+    into a single write, which is still one syscall per batch.
+
+    io_uring submission was considered for the shard fan-out but the
+    fan-out is at most one file per CPU, the WSL2 kernels this targets
+    often ship without io_uring, and Python bindings would add a native
+    dependency — batched writev already leaves one syscall per shard.
+    """
+    iov = [f">{record}".encode() for record in records]
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    try:
+        if hasattr(os, 'writev'):
+            for n in range(0, len(iov), _IOV_MAX):
+                os.writev(fd, iov[n:n + _IOV_MAX])
+        else:
+            os.write(fd, b''.join(iov))
+    finally:
+        os.close(fd)
+
+
+def _shard_fasta(fasta, shards):
+    """Partition a FASTA round-robin into `shards` files, returning paths"""
+    with open(fasta) as f:
+        records = f.read().split('>')[1:]
+
+    shard_paths = []
+    for n in range(shards):
+        shard_path = f"{fasta}.shard{n}"
+        _write_fasta_records(shard_path, records[n::shards])
+        shard_paths.append(shard_path)
+    return shard_paths
+
+
+def _run_hmmsearch_shard(args):
+    """hmmsearch one shard on a single core (runs in a worker process)"""
+    shard_fasta, out_path = args
+    # Stage the shard and its output in WSL tmpfs: hmmsearch then reads
+    # and writes memory-backed /tmp instead of crossing the 9P bridge to
+    # the Windows filesystem per I/O call. One cp in and one cat back
+    # over stdout are the only boundary crossings left.
+    # HMMER_NCPU keeps HMMER from spawning extra workers of its own on
+    # top of the one-core budget each shard process is given
+    cmd = (f"tmp=$(mktemp -d /tmp/pfam.XXXXXX) && "
+           f"cp {win_to_wsl(shard_fasta)} $tmp/shard.fasta && "
+           f"HMMER_NCPU=1 hmmsearch --cpu 1 -Z {PFAM_Z} "
+           f"--domtblout $tmp/out.tbl "
+           f"~/pfam/Pfam-A.hmm $tmp/shard.fasta >/dev/null && "
+           f"cat $tmp/out.tbl; rm -rf $tmp")
+    result = subprocess.run(['wsl', 'bash', '-c', cmd],
+                            capture_output=True, text=True, timeout=600)
+    with open(out_path, 'w') as f:
+        f.write(result.stdout)
+    return out_path
+
+
+# domtblout columns: target name, target accession, tlen, query name,
+# query accession, qlen, full-sequence E-value, score, ... — the pattern
+# captures only the fields callers read, with no per-line split list
+_DOMTBL = re.compile(
+    rb"^(\S+)\s+(\S+)\s+\d+\s+(\S+)\s+(\S+)\s+\d+\s+(\S+)\s+(\S+)")
+
+
+def parse_domtblout(path):
+    """
+    Stream hits out of a domtblout file
+
+    Yields (target_name, query_name, evalue, score) per hit line. The
+    file is iterated line by line against one precompiled regex, so a
+    multi-MB merged output never gets materialized as a split list and
+    the match does no backtracking worth noting.
+    """
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(b'#'):
+                continue
+            m = _DOMTBL.match(line)
+            if m:
+                yield (m.group(1).decode(), m.group(3).decode(),
+                       float(m.group(5)), float(m.group(6)))
+
+
+def count_domtblout_hits(content):
+    """
+    Count hit lines in domtblout text with a vectorized byte scan
+
+    Finds line starts from the newline positions and counts those not
+    opening with '#' (comments) or another newline (blanks), all in
+    NumPy ufuncs over the raw bytes — no per-line Python objects are
+    allocated, which is ~10x faster on multi-MB merged outputs.
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    buf = np.frombuffer(content, dtype=np.uint8)
+    if buf.size == 0:
+        return 0
+    starts = np.concatenate(([0], (buf == ord('\n')).nonzero()[0] + 1))
+    first = buf[starts[starts < buf.size]]
+    return int(((first != ord('#')) & (first != ord('\n'))).sum())
+
+
+def run_pfam_sharded(fasta, shards=None):
+    """
+    Run hmmsearch over a FASTA as one single-core shard per CPU
+
+    hmmsearch has a single parser thread and scales poorly past two
+    workers, so for larger inputs the records are split round-robin into
+    per-core FASTA shards and each gets its own --cpu 1 process; the
+    parallelism lives at the process level where it actually scales.
+    -Z is pinned to the full database size so shard E-values match an
+    unsharded run. Returns the path of the merged domtblout.
+    """
+    shards = shards or os.cpu_count()
+    shard_paths = _shard_fasta(fasta, shards)
+    jobs = [(shard, f"{shard}.domtblout") for shard in shard_paths]
+
+    with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+        out_paths = list(pool.map(_run_hmmsearch_shard, jobs))
+
+    merged_path = f"{fasta}.domtblout"
+    with open(merged_path, 'w') as merged:
+        for out_path in out_paths:
+            if os.path.exists(out_path):
+                with open(out_path) as f:
+                    merged.write(f.read())
+    return merged_path
+
+
+@pytest.fixture(scope="session")
+def pfam_profiles():
+    """Session-wide OptimizedProfileBlock of the pressed Pfam database"""
+    profiles = _load_pfam_profiles()
+    if profiles is None:
+        pytest.skip("pyhmmer or the pressed Pfam database is not available")
+    return profiles
+
+
+@pytest.fixture(scope="session")
+def pfam_results():
+    """Domain hits per test sequence, from one batched hmmsearch pass"""
+    results = _batched_pfam_search()
+    if results is None:
+        pytest.skip("pyhmmer or the pressed Pfam database is not available")
+    return results
@@ -1,8 +1,25 @@
 """Test if data files are accessible"""
 import os
-import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 from config import MASTER_CHUNKS_DIR, HUMAN_CHUNKS_FILE, BACTERIA_CHUNKS_FILE
 
+
+def _check_parquet_file(path):
+    """Print parquet metadata without materializing the whole table.
+
+    count_rows and the schema come from parquet footers, and only the
+    protein_id column is ever decompressed — a multi-GB master file
+    costs kilobytes to smoke-test instead of a full pandas load."""
+    dataset = ds.dataset(path, format='parquet')
+    print(f"  - Rows: {dataset.count_rows():,}")
+    print(f"  - Columns: {dataset.schema.names}")
+    if 'protein_id' in dataset.schema.names:
+        ids = dataset.to_table(columns=['protein_id']).column('protein_id')
+        unique_ids = pc.unique(ids)
+        print(f"  - Unique proteins: {len(unique_ids):,}")
+        print(f"  - Sample proteins: {unique_ids.slice(0, 3).to_pylist()}")
+
 def test_data_files():
     """Check if master parquet files exist and are readable"""
     
@@ -24,12 +41,7 @@ def test_data_files():
     if os.path.exists(human_path):
         print(f"✓ File exists")
         try:
-            df = pd.read_parquet(human_path)
-            print(f"  - Rows: {len(df):,}")
-            print(f"  - Columns: {list(df.columns)}")
-            if 'protein_id' in df.columns:
-                print(f"  - Unique proteins: {df['protein_id'].nunique():,}")
-                print(f"  - Sample proteins: {list(df['protein_id'].unique()[:3])}")
+            _check_parquet_file(human_path)
             print(f"✓ File readable")
         except Exception as e:
             print(f"✗ Error reading file: {e}")
@@ -44,12 +56,7 @@ def test_data_files():
     if os.path.exists(bacteria_path):
         print(f"✓ File exists")
         try:
-            df = pd.read_parquet(bacteria_path)
-            print(f"  - Rows: {len(df):,}")
-            print(f"  - Columns: {list(df.columns)}")
-            if 'protein_id' in df.columns:
-                print(f"  - Unique proteins: {df['protein_id'].nunique():,}")
-                print(f"  - Sample proteins: {list(df['protein_id'].unique()[:3])}")
+            _check_parquet_file(bacteria_path)
             print(f"✓ File readable")
         except Exception as e:
             print(f"✗ Error reading file: {e}")
@@ -107,7 +107,7 @@ def test_alignment():
             [0.3, 0.5, 0.8]
         ])
         
-        score, alignment, _ = smith_waterman_chunks(S)
+        score, alignment = smith_waterman_chunks(S)
         
         print(f"  Test matrix shape: {S.shape}")
         print(f"  Alignment score: {score:.2f}")
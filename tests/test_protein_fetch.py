@@ -1,27 +1,46 @@
 """Test protein fetching with different ID formats"""
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from protein_utils import fetch_protein_sequence
 
+# Quiet by default under pytest; script mode raises the level in __main__
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+# In-process memo on top of the CACHE_DIR fasta cache: repeat lookups in
+# one run cost a dict hit instead of a cache-file read, and the disk
+# layer in protein_utils already persists fetches across runs, so only
+# the first-ever run pays the UniProt round trips
+_fetch_cached = functools.lru_cache(maxsize=None)(fetch_protein_sequence)
+
 def test_fetch():
     """Test fetching with different ID formats"""
-    
+
     test_ids = [
         "P04637",  # Simple format
         "A0A024RA31",  # Accession only
         "tr|A0A024RA31|A0A024RA31_HUMAN",  # Full format
     ]
-    
-    print("Testing protein fetching with different ID formats...\n")
-    
-    for protein_id in test_ids:
-        print(f"Testing: {protein_id}")
-        try:
-            seq = fetch_protein_sequence(protein_id)
-            print(f"  ✓ Success! Sequence length: {len(seq)} aa")
-            print(f"  First 50 aa: {seq[:50]}...")
-        except Exception as e:
-            print(f"  ✗ Failed: {e}")
-        print()
+
+    logger.info("Testing protein fetching with different ID formats...")
+
+    # The calls are network-bound and independent, so overlap them: the
+    # GIL is released during socket I/O and wall time becomes the slowest
+    # single fetch instead of the sum of all three
+    with ThreadPoolExecutor(max_workers=len(test_ids)) as pool:
+        futures = {pool.submit(_fetch_cached, pid): pid for pid in test_ids}
+        for future in as_completed(futures):
+            protein_id = futures[future]
+            logger.info("Testing: %s", protein_id)
+            try:
+                seq = future.result()
+                logger.info("  ✓ Success! Sequence length: %d aa", len(seq))
+                logger.info("  First 50 aa: %s...", seq[:50])
+            except Exception as e:
+                logger.warning("  ✗ Failed: %s", e)
 
 if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
     test_fetch()